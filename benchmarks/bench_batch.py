@@ -0,0 +1,70 @@
+"""Throughput of the NumPy batch solver against a Python loop over sd_webui_ar.calc.
+
+    python benchmarks/bench_batch.py [rows]
+
+Both paths are timed on the same rows and their results compared element by element.
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sd_webui_ar import batch, calc  # noqa: E402
+
+
+def make_rows(count):
+    rng = random.Random(0)
+    ratios = [1.0, 3 / 2, 4 / 3, 16 / 9, 1.85, 0.56, 0.67, 2.33, 9 / 16, 0.46]
+    widths = [rng.randint(64, 4096) for _ in range(count)]
+    heights = [rng.randint(64, 4096) for _ in range(count)]
+    ars = [rng.choice(ratios) for _ in range(count)]
+    return widths, heights, ars
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    widths, heights, ars = make_rows(count)
+    w, h, ar = np.array(widths), np.array(heights), np.array(ars)
+
+    cases = {
+        "apply_aspect_ratio": (
+            lambda: [calc.apply_aspect_ratio(*row) for row in zip(ars, widths, heights)],
+            lambda: batch.apply_aspect_ratios(w, h, ar),
+            lambda result: np.column_stack(result).tolist(),
+        ),
+        "solve_aspect_ratio": (
+            lambda: [calc.solve_aspect_ratio(a, 0, a, b) for a, b in zip(widths, heights)],
+            lambda: batch.solve_aspect_ratios(w, 0, w, h),
+            lambda result: result.tolist(),
+        ),
+        "get_reduced_ratio": (
+            lambda: [calc.get_reduced_ratio(a, b) for a, b in zip(widths, heights)],
+            lambda: batch.reduce_ratios(w, h),
+            lambda result: batch.format_ratios(*result),
+        ),
+    }
+
+    print(f"{count} rows")
+    for name, (scalar, vector, to_list) in cases.items():
+        expected, scalar_time = timed(scalar)
+        actual, vector_time = timed(vector)
+        if expected != to_list(actual):
+            raise SystemExit(f"{name}: batch results differ from the scalar function")
+        print(
+            f"  {name:20} loop {count / scalar_time:12,.0f}/s"
+            f"  batch {count / vector_time:14,.0f}/s  ({scalar_time / vector_time:.0f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
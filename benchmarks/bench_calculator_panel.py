@@ -0,0 +1,44 @@
+"""UI build time and page config size with the full calculator panel, the
+lightweight one built in the browser on first use, and no calculator.
+
+    python benchmarks/bench_calculator_panel.py [preset counts...]
+"""
+import json
+import sys
+import tempfile
+import time
+
+import webui_stubs
+
+MODES = ("Full", "Lightweight", "Off")
+
+
+def measure(count, calculator, repeat=3):
+    with tempfile.TemporaryDirectory() as basedir:
+        webui_stubs.write_presets(basedir, count)
+        webui_stubs.install(basedir, arsp__calculator_panel=calculator)
+        module = webui_stubs.load_script()
+        webui_stubs.build_ui(module)
+
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            demo = webui_stubs.build_ui(module)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+
+        config = demo.get_config_file()
+        return best, len(json.dumps(config)), len(config["components"]), len(config["dependencies"])
+
+
+def main():
+    counts = [int(c) for c in sys.argv[1:]] or [10, 100]
+    print(f"{'presets':>8} {'calculator':>12} {'build ms':>9} {'config KiB':>11} {'components':>11} {'events':>7}")
+    for count in counts:
+        for calculator in MODES:
+            elapsed, size, components, events = measure(count, calculator)
+            print(f"{count:>8} {calculator:>12} {elapsed * 1000:>9.1f} {size / 1024:>11.1f} {components:>11} {events:>7}")
+
+
+if __name__ == "__main__":
+    main()
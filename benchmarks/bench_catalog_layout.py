@@ -0,0 +1,101 @@
+"""Page config size and preset buttons in the DOM for the three preset
+layouts: one Gradio button and event per preset, one Gradio button per
+preset with a single dispatch event, and the searchable catalog.
+
+    python benchmarks/bench_catalog_layout.py [preset counts...]
+
+The catalog's browser-side buttons are counted by running sd-webui-ar.js
+under node (if it is on PATH) with the generated preset asset. Each preset
+button is one <button> element plus its label text node in either layout.
+"""
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import webui_stubs
+
+GROUP_SIZE = 50
+
+LAYOUTS = {
+    "per-button": {},
+    "dispatch": {"arsp__preset_dispatch": True},
+    "catalog": {"arsp__preset_layout": "Searchable catalog"},
+}
+
+NODE_RUNNER = r"""
+const fs = require("fs");
+const vm = require("vm");
+const files = process.argv.slice(2).map(f => fs.readFileSync(f, "utf8"));
+const context = {onUiUpdate: () => {}, document: {addEventListener: () => {}}};
+vm.createContext(context);
+files.forEach(source => vm.runInContext(source, context));
+const count = vm.runInContext(`(() => {
+    const groups = arsp__catalog();
+    const first = groups.keys().next().value;
+    return Math.min(arsp__catalog_entries(groups, first, "").length, arsp__catalog_max_matches);
+})()`, context);
+process.stdout.write(String(count));
+"""
+
+
+def rendered_catalog_buttons(basedir):
+    node = shutil.which("node")
+    asset = Path(basedir, "javascript", "arsp__button_titles.js")
+    if node is None or not asset.exists():
+        return None
+    runner = Path(basedir, "runner.js")
+    runner.write_text(NODE_RUNNER, encoding="utf-8")
+    script = webui_stubs.ROOT / "javascript" / "sd-webui-ar.js"
+    output = subprocess.run([node, str(runner), str(asset), str(script)], capture_output=True, text=True, check=True)
+    return int(output.stdout)
+
+
+def measure(count, layout):
+    with tempfile.TemporaryDirectory() as basedir:
+        webui_stubs.write_presets(basedir, count, GROUP_SIZE)
+        webui_stubs.install(basedir, **LAYOUTS[layout])
+        module = webui_stubs.load_script()
+
+        start = time.perf_counter()
+        demo = webui_stubs.build_ui(module)
+        elapsed = time.perf_counter() - start
+
+        config = demo.get_config_file()
+        # Preset buttons Gradio renders (favorites included), over both tabs
+        gradio_buttons = sum(
+            1 for c in config["components"]
+            if c["type"] == "button" and c["props"].get("elem_id", "").startswith(("arsp__txt_", "arsp__img_"))
+            and not c["props"]["elem_id"].endswith("_dispatch")
+        )
+        browser_buttons = 0
+        if layout == "catalog":
+            per_tab = rendered_catalog_buttons(basedir)
+            browser_buttons = None if per_tab is None else 2 * per_tab
+        return {
+            "build_ms": elapsed * 1000,
+            "config_bytes": len(json.dumps(config)),
+            "events": len(config["dependencies"]),
+            "buttons": None if browser_buttons is None else gradio_buttons + browser_buttons,
+        }
+
+
+def main():
+    counts = [int(c) for c in sys.argv[1:]] or [100, 500, 2000]
+    print(f"{'presets':>8} {'layout':>10} {'build ms':>9} {'config KiB':>11} {'events':>7} {'buttons':>8} {'~DOM nodes':>11}")
+    for count in counts:
+        for layout in LAYOUTS:
+            r = measure(count, layout)
+            buttons = "n/a" if r["buttons"] is None else r["buttons"]
+            nodes = "n/a" if r["buttons"] is None else 2 * r["buttons"]
+            print(
+                f"{count:>8} {layout:>10} {r['build_ms']:>9.0f} {r['config_bytes'] / 1024:>11.1f} "
+                f"{r['events']:>7} {buttons:>8} {nodes:>11}"
+            )
+
+
+if __name__ == "__main__":
+    main()
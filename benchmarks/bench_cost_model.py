@@ -0,0 +1,89 @@
+"""Fit quality and speed of the generation cost model on synthetic timings.
+
+    python benchmarks/bench_cost_model.py [samples]
+
+Generations are simulated with a known per-sampler cost (a fixed overhead
+plus a cost per pixel-step) and multiplicative noise, recorded through
+AspectRatioScript.postprocess into a temporary store, and the fitted model
+is compared with the true costs.
+"""
+import random
+import sys
+import tempfile
+import time
+import types
+
+import webui_stubs
+
+# seconds = overhead + per_pixel_step * pixels * steps * images
+TRUE_COSTS = {
+    "Euler a": (0.8, 1.0e-8),
+    "DPM++ 2M Karras": (0.9, 1.1e-8),
+    "DPM++ SDE Karras": (1.1, 2.0e-8),
+}
+SIZES = [(512, 512), (768, 512), (512, 768), (1024, 1024), (1216, 832), (1344, 768), (640, 1536)]
+
+
+def fake_processing(rng, sampler):
+    w, h = rng.choice(SIZES)
+    p = types.SimpleNamespace(
+        width=w, height=h, steps=rng.choice([20, 25, 30, 40]), sampler_name=sampler,
+        n_iter=1, batch_size=rng.choice([1, 1, 2, 4]), enable_hr=rng.random() < 0.2,
+        hr_upscale_to_x=int(w * 1.5), hr_upscale_to_y=int(h * 1.5), hr_second_pass_steps=0,
+    )
+    return p
+
+
+def true_seconds(p):
+    from sd_webui_ar.costmodel import generation_work
+
+    overhead, per_step = TRUE_COSTS[p.sampler_name]
+    hr = (p.hr_upscale_to_x, p.hr_upscale_to_y, p.steps) if p.enable_hr else (0, 0, 0)
+    return overhead + per_step * generation_work(p.width, p.height, p.steps, p.n_iter * p.batch_size, *hr)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    rng = random.Random(0)
+
+    with tempfile.TemporaryDirectory() as basedir:
+        webui_stubs.install(basedir)
+        module = webui_stubs.load_script()
+        from sd_webui_ar.costmodel import CostModel, CostStore, get_cost_model
+
+        script = module.AspectRatioScript()
+        for _ in range(count):
+            p = fake_processing(rng, rng.choice(list(TRUE_COSTS)))
+            script.process(p)
+            # Pretend the generation took its true time, with 10% noise
+            p.arsp__started -= true_seconds(p) * rng.uniform(0.9, 1.1)
+            script.postprocess(p, None)
+
+        store = module.cost_store_file()
+        model = get_cost_model(store)
+        print(f"{count} samples, {store.stat().st_size / count:.0f} bytes each on disk")
+
+        worst = 0.0
+        for sampler, (overhead, per_step) in TRUE_COSTS.items():
+            fitted = model.coefficients(sampler)
+            print(f"  {sampler:<18} true a={overhead:.2f} b={per_step:.2e}  fitted a={fitted[0]:.2f} b={fitted[1]:.2e}")
+            for w, h in SIZES:
+                truth = overhead + per_step * w * h * 30
+                worst = max(worst, abs(model.estimate(w, h, 30, sampler) / truth - 1))
+        print(f"  worst estimate error at 30 steps: {worst * 100:.1f}%")
+
+        start = time.perf_counter()
+        samples = CostStore(store).load()
+        load = time.perf_counter() - start
+        start = time.perf_counter()
+        CostModel(samples)
+        fit = time.perf_counter() - start
+        start = time.perf_counter()
+        for _ in range(10000):
+            model.estimate(1024, 1024, 30, "Euler a")
+        estimate = (time.perf_counter() - start) / 10000
+        print(f"  load {load * 1000:.2f} ms, fit {fit * 1000:.2f} ms, estimate {estimate * 1e6:.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Compare the AST ratio compiler against the old per-line eval() path.
+
+    python benchmarks/bench_expressions.py [presets]
+"""
+import random
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sd_webui_ar.catalog import parse_aspect_ratios  # noqa: E402
+
+
+def make_lines(count, distinct=200):
+    rng = random.Random(0)
+    pool = [f"{rng.randint(1, 32)}/{rng.randint(1, 32)}" for _ in range(distinct // 2)]
+    pool += [f"{rng.uniform(0.2, 4):.2f}" for _ in range(distinct - len(pool))]
+    return [f"r{i}, {rng.choice(pool)} # preset {i}\n" for i in range(count)]
+
+
+def parse_with_eval(lines):
+    values = []
+    for line in lines:
+        if line.startswith("#") or "," not in line:
+            continue
+        label, value = line.strip().split(",")
+        if "#" in value:
+            value, _ = value.split("#")
+        values.append(eval(value))
+    return values
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    lines = make_lines(count)
+    number = 5
+
+    eval_time = timeit.timeit(lambda: parse_with_eval(lines), number=number) / number
+    ast_time = timeit.timeit(lambda: parse_aspect_ratios(lines), number=number) / number
+
+    print(f"{count} presets")
+    print(f"  eval():       {eval_time * 1000:8.2f} ms")
+    print(f"  ast compiler: {ast_time * 1000:8.2f} ms ({eval_time / ast_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
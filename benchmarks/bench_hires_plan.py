@@ -0,0 +1,78 @@
+"""Hires. fix planning: the pruned search over the sorted candidate table
+against scoring every candidate, on random targets for each model family.
+Both must pick bases of the same work, and every plan must reach its target.
+
+    python benchmarks/bench_hires_plan.py [targets]
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sd_webui_ar.buckets import MODEL_FAMILIES  # noqa: E402
+from sd_webui_ar.costmodel import generation_work  # noqa: E402
+from sd_webui_ar.hiresplan import plan_hires, upscale_table, upscaled_size  # noqa: E402
+
+
+# Targets within the largest base that still need an upscale from a smaller one
+SMALL_TARGETS = [(1280, 720, "SDXL"), (1000, 1000, "SDXL"), (600, 400, "SD1.5"), (720, 1280, "SD2")]
+
+
+def brute_force(target, family, steps, hr_steps):
+    tw, th = target
+    return min(
+        (
+            generation_work(w, h, steps, 1, *upscaled_size((w, h), target), hr_steps or steps)
+            for w, h in upscale_table(family).sizes
+            if w < tw or h < th
+        ),
+        default=None,
+    )
+
+
+def reaches(plan):
+    if plan.enabled:
+        (w, h), (tw, th), (uw, uh) = plan.base, plan.target, plan.upscaled
+        return uw >= tw and uh >= th and round(w * plan.scale) >= tw and round(h * plan.scale) >= th
+    return plan.base == plan.target
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    rng = random.Random(0)
+    cases = [
+        (rng.randrange(1024, 4097, 8), rng.randrange(1024, 4097, 8), family, rng.randint(10, 50), rng.choice((0, 10, 20)))
+        for family in MODEL_FAMILIES
+        for _ in range(count // len(MODEL_FAMILIES))
+    ]
+    cases += [(w, h, family, 20, 0) for w, h, family in SMALL_TARGETS]
+    cases += [
+        (rng.randrange(256, 1537, 8), rng.randrange(256, 1537, 8), family, 20, 0)
+        for family in MODEL_FAMILIES
+        for _ in range(count // 10 // len(MODEL_FAMILIES))
+    ]
+
+    start = time.perf_counter()
+    plans = [plan_hires(*case) for case in cases]
+    pruned = time.perf_counter() - start
+
+    start = time.perf_counter()
+    best = [brute_force((w, h), family, steps, hr_steps) for w, h, family, steps, hr_steps in cases]
+    brute = time.perf_counter() - start
+
+    mismatches = sum(plan.enabled and plan.work != work for plan, work in zip(plans, best))
+    unreached = sum(not reaches(plan) for plan in plans)
+    visited = sum(plan.visited for plan in plans) / len(plans)
+    sizes = ", ".join(f"{name} {len(upscale_table(name).sizes)}" for name in MODEL_FAMILIES)
+    print(f"{len(cases)} targets, candidates per family: {sizes}")
+    print(f"  pruned search:  {pruned / len(cases) * 1e6:7.1f} us/plan  ({visited:.1f} candidates scored)")
+    print(f"  every candidate:{brute / len(cases) * 1e6:7.1f} us/plan")
+    print(f"  plans costlier than the brute force minimum: {mismatches}")
+    print(f"  plans that miss their target: {unreached}")
+    sys.exit(1 if mismatches or unreached else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Latency and peak memory of reading image dimensions: the old path (upload
+the whole image, decode it as gradio's Image preprocessing does) versus the
+header probe on the same base64 payload. Peak memory is what tracemalloc
+sees, so pixel buffers allocated inside PIL are not even counted.
+
+    python benchmarks/bench_image_probe.py [width height]
+"""
+import base64
+import io
+import os
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from PIL import Image, ImageOps
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sd_webui_ar.imageprobe import probe_dimensions  # noqa: E402
+
+
+def decode_like_gradio(url):
+    data = base64.b64decode(url.partition(",")[2])
+    image = ImageOps.exif_transpose(Image.open(io.BytesIO(data)))
+    return image.convert("RGB").size
+
+
+def measure(fn, url, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(url)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn(url)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, best, peak
+
+
+def main():
+    size = tuple(map(int, sys.argv[1:3])) if len(sys.argv) > 2 else (3840, 2160)
+    # Noise does not compress, so the payload is as large as a detailed render
+    image = Image.frombytes("RGB", size, os.urandom(size[0] * size[1] * 3))
+
+    for fmt in ("PNG", "JPEG", "WEBP"):
+        buffer = io.BytesIO()
+        image.save(buffer, fmt)
+        url = f"data:image/{fmt.lower()};base64," + base64.b64encode(buffer.getvalue()).decode()
+
+        expected, old_time, old_peak = measure(decode_like_gradio, url)
+        result, new_time, new_peak = measure(probe_dimensions, url)
+        assert tuple(result) == expected, (result, expected)
+
+        print(f"{fmt} {size[0]}x{size[1]}, {len(url) / 2**20:.1f} MiB payload")
+        print(f"  full decode:  {old_time * 1000:9.2f} ms  peak {old_peak / 2**20:8.1f} MiB")
+        print(f"  header probe: {new_time * 1000:9.2f} ms  peak {new_peak / 2**20:8.1f} MiB")
+        # The in-browser probe (arsp__probe_data_url) decodes only the first 64 KiB
+        # and uploads nothing, so the server cost is zero unless it falls back here
+
+
+if __name__ == "__main__":
+    main()
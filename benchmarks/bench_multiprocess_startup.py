@@ -0,0 +1,86 @@
+"""Several webui processes starting at once on a fresh extension directory,
+as with one webui per GPU sharing an install.
+
+    python benchmarks/bench_multiprocess_startup.py [processes] [presets]
+
+Each process writes the default preset files if missing, loads the catalog
+and publishes the titles script, all released by one barrier. The preset
+files and the cache must come out intact, and the preset files must be
+parsed once in total, not once per process.
+"""
+import multiprocessing
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def start(basedir, barrier, results):
+    import webui_stubs
+    from sd_webui_ar.catalog import cache_stats
+
+    webui_stubs.install(basedir)
+    module = webui_stubs.load_script()
+    barrier.wait()
+    begin = time.perf_counter()
+    catalog = module.read_catalog()
+    module.publish_catalog(catalog)
+    results.put((
+        time.perf_counter() - begin,
+        len(catalog.aspect_ratios),
+        len(catalog.resolutions),
+        cache_stats()["misses"],
+    ))
+
+
+def run(processes, presets):
+    import webui_stubs
+    from sd_webui_ar.catalog import CatalogCache
+
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as basedir:
+        if presets:
+            webui_stubs.write_presets(basedir, presets)
+        barrier = context.Barrier(processes)
+        results = context.Queue()
+        workers = [context.Process(target=start, args=(basedir, barrier, results)) for _ in range(processes)]
+        for worker in workers:
+            worker.start()
+        outcomes = [results.get(timeout=300) for _ in workers]
+        for worker in workers:
+            worker.join()
+
+        files = (Path(basedir, "aspect_ratios.txt"), Path(basedir, "resolutions.txt"))
+        reference = CatalogCache().load(*files)
+        cached = CatalogCache(Path(basedir, "presets.cache"))
+        cached.load(*files)
+        titles = list(Path(basedir, "javascript").glob("*button_titles*.js"))
+
+    sizes = {(ar, res) for _, ar, res, _ in outcomes}
+    misses = sum(m for *_, m in outcomes)
+    ok = (
+        sizes == {(len(reference.aspect_ratios), len(reference.resolutions))}
+        and cached.stats()["misses"] == 0
+        and len(titles) == 1
+        and misses == 2
+    )
+    slowest = max(t for t, *_ in outcomes)
+    print(
+        f"{processes} processes, {presets or 'default'} presets: slowest {slowest * 1000:8.1f} ms, "
+        f"{misses} files parsed in total, {len(titles)} titles script  {'ok' if ok else 'FAILED'}"
+    )
+    return ok
+
+
+def main():
+    processes = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    presets = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    ok = all([run(processes, 0), run(processes, presets or 10000)])
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
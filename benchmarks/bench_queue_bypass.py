@@ -0,0 +1,88 @@
+"""Latency of the non-queued preset handlers while the gradio queue is
+saturated by slow jobs, compared with the same handler sent through the queue.
+
+    python benchmarks/bench_queue_bypass.py [slow jobs] [seconds per job]
+
+Client-side latency is measured over HTTP against a local server; the
+server-side counters come from sd_webui_ar.instrument.handler_stats().
+"""
+import json
+import statistics
+import sys
+import tempfile
+import time
+import urllib.request
+
+import gradio as gr
+from gradio_client import Client
+
+import webui_stubs
+
+
+def post(url, fn_index, data):
+    body = json.dumps({"fn_index": fn_index, "data": data}).encode()
+    request = urllib.request.Request(url + "run/predict", body, {"Content-Type": "application/json"})
+    start = time.perf_counter()
+    with urllib.request.urlopen(request) as response:
+        result = json.load(response)
+    return time.perf_counter() - start, result["data"]
+
+
+def sample(fn, count=20):
+    latencies = [fn() for _ in range(count)]
+    return statistics.median(latencies) * 1000, max(latencies) * 1000
+
+
+def main():
+    jobs = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 2.0
+
+    with tempfile.TemporaryDirectory() as basedir:
+        webui_stubs.install(basedir)
+        from sd_webui_ar import instrument
+        from sd_webui_ar.calc import apply_aspect_ratio
+
+        instrument.set_enabled(True)
+        module = webui_stubs.load_script()
+
+        demo = webui_stubs.build_ui(module)
+        with demo:
+            # Stands in for a generation occupying the only queue worker
+            slow = gr.Button(visible=False)
+            slow.click(lambda: time.sleep(seconds), api_name="slow")
+            # The same preset handler, but queued like before
+            queued = gr.Button(visible=False)
+            queued.click(apply_aspect_ratio, inputs=[gr.Number(16 / 9), gr.Number(512), gr.Number(512)], outputs=[gr.JSON()], api_name="queued")
+
+        fast_index = next(
+            i for i, block_fn in enumerate(demo.fns)
+            if getattr(block_fn.fn, "__name__", "") == "apply"
+            and demo.dependencies[i]["queue"] is False
+        )
+        demo.queue(concurrency_count=1)
+        _, url, _ = demo.launch(prevent_thread_lock=True, quiet=True)
+        client = Client(url, verbose=False)
+
+        try:
+            idle = sample(lambda: post(url, fast_index, [512, 512, "Keep side"])[0])
+            pending = [client.submit(api_name="/slow") for _ in range(jobs)]
+            time.sleep(0.5)
+            busy = sample(lambda: post(url, fast_index, [512, 512, "Keep side"])[0])
+
+            start = time.perf_counter()
+            client.predict(16 / 9, 512, 512, api_name="/queued")
+            queued_latency = (time.perf_counter() - start) * 1000
+            for job in pending:
+                job.result()
+        finally:
+            demo.close()
+
+    print(f"queue saturated with {jobs} jobs of {seconds:.1f}s (concurrency 1)")
+    print(f"  fast path, idle:      median {idle[0]:7.1f} ms  max {idle[1]:7.1f} ms")
+    print(f"  fast path, saturated: median {busy[0]:7.1f} ms  max {busy[1]:7.1f} ms")
+    print(f"  queued handler, saturated: {queued_latency:9.1f} ms")
+    print(json.dumps(instrument.handler_stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""UI build time and page config size with one event per preset button
+versus the single dispatch event per tab.
+
+    python benchmarks/bench_ui_build.py [preset counts...]
+"""
+import json
+import sys
+import tempfile
+import time
+
+import webui_stubs
+
+
+def measure(count, dispatch):
+    with tempfile.TemporaryDirectory() as basedir:
+        webui_stubs.write_presets(basedir, count)
+        webui_stubs.install(basedir, arsp__preset_dispatch=dispatch)
+        module = webui_stubs.load_script()
+
+        start = time.perf_counter()
+        demo = webui_stubs.build_ui(module)
+        elapsed = time.perf_counter() - start
+
+        config = demo.get_config_file()
+        return elapsed, len(json.dumps(config)), len(config["dependencies"])
+
+
+def main():
+    counts = [int(c) for c in sys.argv[1:]] or [10, 100, 1000]
+    print(f"{'presets':>8} {'mode':>9} {'build ms':>9} {'config KiB':>11} {'events':>7}")
+    for count in counts:
+        for dispatch in (False, True):
+            elapsed, size, events = measure(count, dispatch)
+            mode = "dispatch" if dispatch else "per-button"
+            print(f"{count:>8} {mode:>9} {elapsed * 1000:>9.0f} {size / 1024:>11.1f} {events:>7}")
+
+
+if __name__ == "__main__":
+    main()
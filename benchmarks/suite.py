@@ -0,0 +1,197 @@
+"""Scaling benchmarks for the extension, runnable without a webui install.
+
+    python benchmarks/suite.py [--sizes 10 100 1000 10000] [--out results.json]
+                               [--compare baseline.json] [--threshold 1.5]
+
+Each result is the median and minimum wall time per call over several
+repeats. The JSON output has sorted keys and results in a fixed order, so
+two runs can be diffed or compared with --compare, which exits with status 1
+when the minimum time of any benchmark grew past threshold times its
+baseline.
+"""
+import argparse
+import json
+import math
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import gradio as gr
+
+import webui_stubs
+
+SCHEMA = 1
+DEFAULT_SIZES = (10, 100, 1000, 10000)
+
+
+def timings(fn, repeat, min_sample=0.02):
+    """Per-call times of fn, each averaged over enough calls to take at
+    least min_sample seconds, so sub-millisecond results are not noise."""
+    start = time.perf_counter()
+    fn()
+    number = max(1, math.ceil(min_sample / max(time.perf_counter() - start, 1e-9)))
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number)
+    return samples
+
+
+def result(name, presets, samples, **extra):
+    return {
+        "benchmark": name,
+        "presets": presets,
+        "repeat": len(samples),
+        "median_ms": round(statistics.median(samples) * 1000, 4),
+        "min_ms": round(min(samples) * 1000, 4),
+        **extra,
+    }
+
+
+def bench_functions(basedir, size, repeat):
+    from sd_webui_ar.calc import get_reduced_ratio, solve_aspect_ratio
+    from sd_webui_ar.catalog import parse_aspect_ratios, parse_resolutions
+    from sd_webui_ar.modes import AR_MODES
+
+    ar_lines = Path(basedir, "aspect_ratios.txt").read_text(encoding="utf-8").splitlines(True)
+    res_lines = Path(basedir, "resolutions.txt").read_text(encoding="utf-8").splitlines(True)
+    yield result("parse_aspect_ratios", size, timings(lambda: parse_aspect_ratios(ar_lines), repeat))
+    yield result("parse_resolutions", size, timings(lambda: parse_resolutions(res_lines), repeat))
+
+    # One call per preset, as the calculator would make for each of them
+    pairs = [(p.width, p.height) for p in parse_resolutions(res_lines)]
+    yield result(
+        "get_reduced_ratio", size,
+        timings(lambda: [get_reduced_ratio(w, h) for w, h in pairs], repeat),
+    )
+    yield result(
+        "solve_aspect_ratio", size,
+        timings(lambda: [solve_aspect_ratio(w, 0, w, h) for w, h in pairs], repeat),
+    )
+
+    module = webui_stubs.load_script()
+    buttons = [module.ARButton(ar=p.value) for p in parse_aspect_ratios(ar_lines)]
+    for mode in AR_MODES:
+        yield result(
+            "ARButton.apply", size,
+            timings(lambda: [b.apply(512, 768, mode) for b in buttons], repeat),
+            mode=mode,
+        )
+
+
+def bench_catalog(basedir, size, repeat):
+    from sd_webui_ar import catalog
+
+    files = (Path(basedir, "aspect_ratios.txt"), Path(basedir, "resolutions.txt"))
+    yield result(
+        "catalog_load", size,
+        timings(lambda: catalog.CatalogCache().load(*files), repeat),
+        cache="cold",
+    )
+    catalog.CatalogCache(Path(basedir, "presets.cache")).load(*files)
+
+    # A new process with the cache file already written
+    yield result(
+        "catalog_load", size,
+        timings(lambda: catalog.CatalogCache(Path(basedir, "presets.cache")).load(*files), repeat),
+        cache="file",
+    )
+    shared = catalog.CatalogCache()
+    shared.load(*files)
+    yield result("catalog_load", size, timings(lambda: shared.load(*files), repeat), cache="memory")
+
+
+def bench_ui(basedir, size, repeat):
+    for dispatch in (False, True):
+        webui_stubs.install(basedir, arsp__preset_dispatch=dispatch)
+        module = webui_stubs.load_script()
+        demo = [None]
+        samples = timings(lambda: demo.__setitem__(0, webui_stubs.build_ui(module)), repeat, min_sample=0)
+        config = demo[0].get_config_file()
+        yield result(
+            "ui", size, samples,
+            dispatch=dispatch,
+            config_bytes=len(json.dumps(config)),
+            components=len(config["components"]),
+            events=len(config["dependencies"]),
+        )
+
+
+def run(sizes):
+    results = []
+    for size in sizes:
+        # Fewer repeats where a single run already takes seconds
+        repeat = 5 if size <= 1000 else 2
+        with tempfile.TemporaryDirectory() as basedir:
+            webui_stubs.write_presets(basedir, size)
+            webui_stubs.install(basedir)
+            for bench in (bench_functions, bench_catalog, bench_ui):
+                for entry in bench(basedir, size, repeat if bench is not bench_ui else max(1, repeat // 2)):
+                    print(
+                        f"{entry['benchmark']:>20} {size:>6} "
+                        f"{entry['median_ms']:>11.3f} ms  "
+                        + " ".join(f"{k}={v}" for k, v in entry.items() if k not in ("benchmark", "presets", "repeat", "median_ms", "min_ms")),
+                        file=sys.stderr,
+                    )
+                    results.append(entry)
+    return {
+        "schema": SCHEMA,
+        "environment": {
+            "python": platform.python_version(),
+            "gradio": gr.__version__,
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+
+def key(entry):
+    extra = tuple(sorted((k, str(v)) for k, v in entry.items() if k in ("mode", "cache", "dispatch")))
+    return entry["benchmark"], entry["presets"], extra
+
+
+def compare(report, baseline, threshold):
+    old = {key(e): e for e in baseline["results"]}
+    regressions = 0
+    for entry in report["results"]:
+        before = old.get(key(entry))
+        if before is None or not before["min_ms"]:
+            continue
+        ratio = entry["min_ms"] / before["min_ms"]
+        flag = "REGRESSION" if ratio > threshold else ""
+        regressions += bool(flag)
+        name, presets, extra = key(entry)
+        label = " ".join(f"{k}={v}" for k, v in extra)
+        print(f"{name:>20} {presets:>6} {label:<24} {before['min_ms']:>11.4f} -> {entry['min_ms']:>11.4f} ms  x{ratio:.2f} {flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--out", help="write the JSON report here instead of stdout")
+    parser.add_argument("--compare", help="baseline JSON report from an earlier run")
+    parser.add_argument("--threshold", type=float, default=1.5)
+    args = parser.parse_args()
+
+    report = run(args.sizes)
+    text = json.dumps(report, indent=2, sort_keys=True) + "\n"
+    if args.out:
+        Path(args.out).write_text(text, encoding="utf-8")
+    elif not args.compare:
+        sys.stdout.write(text)
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        if compare(report, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
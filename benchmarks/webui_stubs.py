@@ -0,0 +1,135 @@
+"""Minimal stand-ins for the webui modules imported by scripts/sd-webui-ar.py,
+so the script can be loaded and its UI built with plain gradio."""
+import importlib.util
+import sys
+import types
+import warnings
+from pathlib import Path
+
+import gradio as gr
+
+# The webui patches gradio to accept a few extra kwargs (full_width, ...)
+warnings.filterwarnings("ignore", message="You have unused kwarg parameters")
+
+ROOT = Path(__file__).resolve().parent.parent
+SCRIPT = ROOT / "scripts" / "sd-webui-ar.py"
+
+
+class Script:
+    pass
+
+
+class ToolButton(gr.Button):
+    def __init__(self, *args, **kwargs):
+        classes = kwargs.pop("elem_classes", [])
+        super().__init__(*args, elem_classes=["tool", *classes], **kwargs)
+
+    def get_block_name(self):
+        return "button"
+
+
+class OptionInfo:
+    def __init__(self, default=None, label="", *args, **kwargs):
+        self.default = default
+        self.label = label
+
+    def needs_reload_ui(self):
+        return self
+
+    def needs_restart(self):
+        return self
+
+
+class Options:
+    def __init__(self, **values):
+        self.__dict__.update(values)
+
+    def add_option(self, key, info):
+        self.__dict__.setdefault(key, info.default)
+
+
+def install(basedir, **opts):
+    """Register fake modules.* packages rooted at basedir, with the given
+    shared.opts values."""
+    Path(basedir, "javascript").mkdir(parents=True, exist_ok=True)
+
+    modules = types.ModuleType("modules")
+    scripts = types.ModuleType("modules.scripts")
+    scripts.Script = Script
+    scripts.AlwaysVisible = object()
+    scripts.basedir = lambda: str(basedir)
+
+    ui_components = types.ModuleType("modules.ui_components")
+    ui_components.ToolButton = ToolButton
+
+    shared = types.ModuleType("modules.shared")
+    shared.OptionInfo = OptionInfo
+    shared.opts = Options(**opts)
+    shared.state = types.SimpleNamespace(interrupted=False, skipped=False)
+
+    script_callbacks = types.ModuleType("modules.script_callbacks")
+    script_callbacks.on_ui_settings = lambda callback: None
+    script_callbacks.on_app_started = lambda callback: None
+    script_callbacks.on_script_unloaded = lambda callback: None
+
+    for name, module in {
+        "modules": modules,
+        "modules.scripts": scripts,
+        "modules.ui_components": ui_components,
+        "modules.shared": shared,
+        "modules.script_callbacks": script_callbacks,
+    }.items():
+        sys.modules[name] = module
+        if "." in name:
+            setattr(modules, name.split(".")[1], module)
+
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+
+
+def write_presets(basedir, count, group_size=0):
+    """Synthetic aspect_ratios.txt and resolutions.txt with count entries
+    each, split into [group] sections of group_size entries if given."""
+    def header(kind, i):
+        return f"[{kind} {i // group_size}]\n" if group_size and i % group_size == 0 else ""
+
+    with open(Path(basedir, "aspect_ratios.txt"), "w", encoding="utf-8") as f:
+        f.writelines(f"{header('ratios', i)}r{i}, {i % 31 + 1}/{i % 17 + 1} # ratio {i}\n" for i in range(count))
+    with open(Path(basedir, "resolutions.txt"), "w", encoding="utf-8") as f:
+        f.writelines(f"{header('sizes', i)}s{i}, {64 * (i % 32 + 1)}, {64 * (i % 24 + 1)} # size {i}\n" for i in range(count))
+
+
+def load_script():
+    spec = importlib.util.spec_from_file_location("sd_webui_ar_script", SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def build_ui(module):
+    """Build both tabs the way the webui does: create the width/height and
+    image components, report them through after_component, then call ui()."""
+    with gr.Blocks() as demo:
+        for is_img2img in (False, True):
+            tab = "img2img" if is_img2img else "txt2img"
+            script = module.AspectRatioScript()
+            for elem_id in (f"{tab}_width", f"{tab}_height"):
+                script.after_component(gr.Slider(64, 2048, step=8, elem_id=elem_id), elem_id=elem_id)
+            if not is_img2img:
+                hires = (
+                    gr.Slider(1, 150, value=20, step=1, elem_id="txt2img_steps"),
+                    gr.Dropdown(["Euler a", "DPM++ 2M Karras"], value="Euler a", elem_id="txt2img_sampling"),
+                    gr.Checkbox(False, elem_id="txt2img_hr"),
+                    gr.Slider(1.0, 4.0, value=2.0, step=0.05, elem_id="txt2img_hr_scale"),
+                    gr.Slider(0, 150, value=0, step=1, elem_id="txt2img_hires_steps"),
+                    gr.Slider(0, 2048, value=0, step=8, elem_id="txt2img_hr_resize_x"),
+                    gr.Slider(0, 2048, value=0, step=8, elem_id="txt2img_hr_resize_y"),
+                )
+                for component in hires:
+                    script.after_component(component, elem_id=component.elem_id)
+            if is_img2img:
+                for elem_id in ("img2img_image", "img2img_sketch", "img2maskimg", "inpaint_sketch", "img_inpaint_base"):
+                    script.after_component(gr.Image(elem_id=elem_id), elem_id=elem_id)
+                script.after_component(gr.Textbox(elem_id="img2img_batch_input_dir"), elem_id="img2img_batch_input_dir")
+            script.ui(is_img2img)
+    return demo
@@ -11,13 +11,723 @@ arsp__ar_button_titles["\u{1f5bc}"] = "Get dimensions from image on the current
 arsp__ar_button_titles["Calculate Height"] = "Calculate new height based on source aspect ratio";
 arsp__ar_button_titles["Calculate Width"] = "Calculate new width based on source aspect ratio";
 arsp__ar_button_titles["Apply"] = "Apply calculated width and height to txt2img/img2img sliders";
+arsp__ar_button_titles["Plan Batch"] = "Work out the target size of every image in the Batch tab's input directory, grouped by size";
+arsp__ar_button_titles["Plan Hires Fix"] = "Set the base size and hires. fix upscale that reach the target size for the least estimated work";
 arsp__ar_button_titles["\uD83D\uDD0D"] = "Round dimensions to the nearest multiples of 4 (1023x101 => 1024x100)";
 
+// Calculator math, ported from sd_webui_ar/calc.py and sd_webui_ar/ratios.py (the reference implementation).
+// tools/check_js_parity.py checks these against the Python functions.
+const arsp__ar_max_denominator = 32;
+const arsp__ar_preset_tolerance = 0.05;
+
+// Python's round(): halves go to the even neighbour
+function arsp__round(x) {
+    const r = Math.round(x);
+    return (Math.abs(x % 1) === 0.5 && r % 2 !== 0) ? r - 1 : r;
+}
+
+function arsp__gcd(a, b) {
+    a = Math.abs(a);
+    b = Math.abs(b);
+    while (b) {
+        [a, b] = [b, a % b];
+    }
+    return a;
+}
+
+function arsp__reduce_ratio(n, d) {
+    n = Math.trunc(n);
+    d = Math.trunc(d);
+    if (n === d) {
+        return [1, 1];
+    }
+    const div = arsp__gcd(n, d);
+    let w = Math.floor(n / div);
+    let h = Math.floor(d / div);
+    if (w === 8 && h === 5) {
+        [w, h] = [16, 10];
+    }
+    return [w, h];
+}
+
+function arsp__get_reduced_ratio(n, d) {
+    const [w, h] = arsp__reduce_ratio(n, d);
+    return `${w}:${h}`;
+}
+
+function arsp__solve_aspect_ratio(w, h, n, d) {
+    if (w) {
+        return arsp__round(w / (n / d));
+    } else if (h) {
+        return arsp__round(h * (n / d));
+    }
+    return 0;
+}
+
+function arsp__snap_to_multiple(value, multiple) {
+    if (!multiple || multiple <= 1) {
+        return arsp__round(value);
+    }
+    return Math.max(multiple, arsp__round(value / multiple) * multiple);
+}
+
+function arsp__apply_pixel_area(ar, area, multiple) {
+    return [
+        arsp__snap_to_multiple(Math.sqrt(area * ar), multiple),
+        arsp__snap_to_multiple(Math.sqrt(area / ar), multiple),
+    ];
+}
+
+// Fraction(n, d).limit_denominator(max_d) for positive integers
+function arsp__limit_denominator(n, d, max_d) {
+    const div = arsp__gcd(n, d);
+    n /= div;
+    d /= div;
+    if (d <= max_d) {
+        return [n, d];
+    }
+    let [p0, q0, p1, q1] = [0, 1, 1, 0];
+    let [nn, dd] = [n, d];
+    for (;;) {
+        const a = Math.floor(nn / dd);
+        const q2 = q0 + a * q1;
+        if (q2 > max_d) {
+            break;
+        }
+        [p0, q0, p1, q1] = [p1, q1, p0 + a * p1, q2];
+        [nn, dd] = [dd, nn - a * dd];
+    }
+    const k = Math.floor((max_d - q0) / q1);
+    const [bp, bq] = [p0 + k * p1, q0 + k * q1];
+    if (Math.abs(p1 * d - n * q1) * bq <= Math.abs(bp * d - n * bq) * q1) {
+        return [p1, q1];
+    }
+    const bdiv = arsp__gcd(bp, bq);
+    return [bp / bdiv, bq / bdiv];
+}
+
+function arsp__approximate_ratio(w, h) {
+    let [n, d] = arsp__reduce_ratio(w, h);
+    if (Math.min(n, d) <= arsp__ar_max_denominator) {
+        return [n, d, true];
+    }
+    if (w >= h) {
+        [n, d] = arsp__limit_denominator(w, h, arsp__ar_max_denominator);
+    } else {
+        [d, n] = arsp__limit_denominator(h, w, arsp__ar_max_denominator);
+    }
+    if (n === 8 && d === 5) {
+        [n, d] = [16, 10];
+    }
+    return [n, d, false];
+}
+
+let arsp__ar_presets_cache = null;
+function arsp__ar_presets() {
+    if (arsp__ar_presets_cache === null) {
+        const presets = typeof arsp__ar_preset_ratios === "undefined" ? [] : arsp__ar_preset_ratios;
+        const sorted = presets.slice().sort((a, b) => a[1] - b[1]);
+        arsp__ar_presets_cache = {presets: sorted, keys: sorted.map(p => Math.log(p[1]))};
+    }
+    return arsp__ar_presets_cache;
+}
+
+function arsp__nearest_preset(index, ratio) {
+    const keys = index.keys;
+    if (!keys.length) {
+        return [null, null];
+    }
+    const key = Math.log(ratio);
+    let lo = 0, hi = keys.length;
+    while (lo < hi) {
+        const mid = (lo + hi) >> 1;
+        if (keys[mid] < key) {
+            lo = mid + 1;
+        } else {
+            hi = mid;
+        }
+    }
+    let i = lo;
+    if (i === keys.length || (i > 0 && key - keys[i - 1] <= keys[i] - key)) {
+        i -= 1;
+    }
+    const preset = index.presets[i];
+    return [preset, preset[1] / ratio - 1];
+}
+
+function arsp__describe_ratio(w, h, index) {
+    w = Math.trunc(w || 0);
+    h = Math.trunc(h || 0);
+    if (w <= 0 || h <= 0) {
+        return `**${arsp__get_reduced_ratio(w, h)}**`;
+    }
+    const [n, d, exact] = arsp__approximate_ratio(w, h);
+    let text = `**${exact ? "" : "≈"}${n}:${d}**`;
+    if (index) {
+        const [preset, error] = arsp__nearest_preset(index, w / h);
+        if (preset !== null && Math.abs(error) <= arsp__ar_preset_tolerance) {
+            const percent = (error * 100).toFixed(1);
+            text += ` · ${preset[0].trim()} ${percent.startsWith("-") ? "" : "+"}${percent}%`;
+        }
+    }
+    return text;
+}
+
+// Gradio handlers (used as _js with no Python fn, so they never reach the server)
+// Generation time estimates from the cost model served by the extension (sd_webui_ar/costmodel.py):
+// seconds = a + b * pixels * steps * images, with a and b per sampler once it has enough samples
+const arsp__cost_model_ttl = 30000;
+let arsp__cost_model = null;
+let arsp__cost_model_time = 0;
+
+function arsp__refresh_cost_model() {
+    if (Date.now() - arsp__cost_model_time < arsp__cost_model_ttl) {
+        return;
+    }
+    arsp__cost_model_time = Date.now();
+    fetch("/sd-webui-ar/v1/cost-model")
+        .then(r => (r.ok ? r.json() : null))
+        .then(model => { arsp__cost_model = model; })
+        .catch(() => {});
+}
+
+function arsp__tab_number(tab, id, fallback) {
+    const input = gradioApp().querySelector(`#${tab}2img_${id} input[type=number]`);
+    const value = input ? Number(input.value) : NaN;
+    return value > 0 ? value : fallback;
+}
+
+function arsp__estimate_seconds(tab, w, h) {
+    arsp__refresh_cost_model();
+    const model = arsp__cost_model;
+    if (!model || !model.samples || !(w > 0 && h > 0)) {
+        return null;
+    }
+    const sampler = gradioApp().querySelector(`#${tab}2img_sampling input`);
+    const coefficients = (sampler && model.samplers[sampler.value]) || model.all;
+    if (!coefficients) {
+        return null;
+    }
+    let steps = arsp__tab_number(tab, "steps", 20);
+    if (tab === "img") {
+        steps = Math.max(1, Math.trunc(steps * arsp__tab_number(tab, "denoising_strength", 0.75)));
+    }
+    const images = arsp__tab_number(tab, "batch_count", 1) * arsp__tab_number(tab, "batch_size", 1);
+    return coefficients[0] + coefficients[1] * w * h * steps * images;
+}
+
+function arsp__format_seconds(seconds) {
+    if (seconds < 59.5) {
+        return `≈${seconds.toFixed(seconds < 10 ? 1 : 0)} s`;
+    }
+    const total = Math.round(seconds);
+    return `≈${Math.floor(total / 60)}m ${String(total % 60).padStart(2, "0")}s`;
+}
+
+function arsp__with_estimate(text, tab, w, h) {
+    const seconds = tab ? arsp__estimate_seconds(tab, w, h) : null;
+    return seconds === null ? text : `${text} · ${arsp__format_seconds(seconds)}`;
+}
+
+// Same format as area_text() in scripts/sd-webui-ar.py, plus the time estimate
+function arsp__area_text(w, h, tab) {
+    w = Math.trunc(w || 0);
+    h = Math.trunc(h || 0);
+    return arsp__with_estimate(`${w}×${h} · ${(w * h / (1024 * 1024)).toFixed(2)} MP`, tab, w, h);
+}
+
+function arsp__calc_height(w2, w1, h1) {
+    return arsp__solve_aspect_ratio(w2, 0, w1, h1);
+}
+
+function arsp__calc_width(h2, w1, h1) {
+    return arsp__solve_aspect_ratio(0, h2, w1, h1);
+}
+
+// Typing fires a change per keystroke; only render the display once input settles
+const arsp__ar_display_delay = 100;
+const arsp__ar_display_state = {};
+function arsp__ar_display(tab, w, h) {
+    const state = arsp__ar_display_state[tab] || (arsp__ar_display_state[tab] = {timer: null, pending: []});
+    return new Promise(function (resolve) {
+        state.pending.push(resolve);
+        clearTimeout(state.timer);
+        state.timer = setTimeout(function () {
+            const text = arsp__with_estimate("Aspect Ratio: " + arsp__describe_ratio(w, h, arsp__ar_presets()), tab, w, h);
+            state.pending.splice(0).forEach(r => r(text));
+        }, arsp__ar_display_delay);
+    });
+}
+
+// Image dimensions from the header of a base64 data URL, without uploading or decoding the image.
+// Mirrors sd_webui_ar/imageprobe.py (PNG, GIF, WebP, JPEG with EXIF orientation); returns null when unsure.
+const arsp__probe_prefix_bytes = 64 * 1024;
+const arsp__fallback_prefix_bytes = 1024 * 1024;
+
+function arsp__base64_prefix(url, limit) {
+    const data = url.slice(url.indexOf(",") + 1, url.indexOf(",") + 1 + Math.ceil(limit / 3) * 4);
+    return data.slice(0, data.length - data.length % 4);
+}
+
+function arsp__exif_orientation(view, start, end) {
+    const exif = [0x45, 0x78, 0x69, 0x66, 0, 0];
+    if (end - start < 14 || exif.some((b, i) => view.getUint8(start + i) !== b)) {
+        return 1;
+    }
+    const tiff = start + 6;
+    const order = view.getUint16(tiff);
+    if (order !== 0x4949 && order !== 0x4d4d) {
+        return 1;
+    }
+    const le = order === 0x4949;
+    const ifd = tiff + view.getUint32(tiff + 4, le);
+    if (ifd + 2 > end) {
+        return 1;
+    }
+    const count = view.getUint16(ifd, le);
+    for (let i = 0; i < count; i++) {
+        const entry = ifd + 2 + 12 * i;
+        if (entry + 12 > end) {
+            break;
+        }
+        if (view.getUint16(entry, le) === 0x0112) {
+            const orientation = view.getUint16(entry + 8, le);
+            return orientation >= 1 && orientation <= 8 ? orientation : 1;
+        }
+    }
+    return 1;
+}
+
+function arsp__jpeg_dimensions(view) {
+    let orientation = 1;
+    let pos = 2;
+    while (pos < view.byteLength) {
+        while (pos < view.byteLength && view.getUint8(pos) !== 0xff) {
+            pos++;
+        }
+        while (pos < view.byteLength && view.getUint8(pos) === 0xff) {
+            pos++;
+        }
+        if (pos >= view.byteLength) {
+            return null;
+        }
+        const marker = view.getUint8(pos++);
+        if (marker === 0x01 || (marker >= 0xd0 && marker <= 0xd8)) {
+            continue;
+        }
+        if (marker === 0xd9 || marker === 0xda || pos + 2 > view.byteLength) {
+            return null;
+        }
+        const length = view.getUint16(pos);
+        if (marker >= 0xc0 && marker <= 0xcf && marker !== 0xc4 && marker !== 0xc8 && marker !== 0xcc) {
+            if (pos + 7 > view.byteLength) {
+                return null;
+            }
+            const h = view.getUint16(pos + 3);
+            const w = view.getUint16(pos + 5);
+            return orientation >= 5 ? [h, w] : [w, h];
+        }
+        if (marker === 0xe1 && orientation === 1) {
+            orientation = arsp__exif_orientation(view, pos + 2, Math.min(pos + length, view.byteLength));
+        }
+        pos += length;
+    }
+    return null;
+}
+
+function arsp__probe_data_url(url, limit) {
+    if (typeof url !== "string" || !url.startsWith("data:")) {
+        return null;
+    }
+    let bytes;
+    try {
+        bytes = Uint8Array.from(atob(arsp__base64_prefix(url, limit)), c => c.charCodeAt(0));
+    } catch (e) {
+        return null;
+    }
+    const view = new DataView(bytes.buffer);
+    const ascii = (start, end) => String.fromCharCode(...bytes.subarray(start, end));
+    if (bytes.length < 10) {
+        return null;
+    }
+    if (bytes[0] === 0x89 && ascii(1, 4) === "PNG" && ascii(12, 16) === "IHDR" && bytes.length >= 24) {
+        return [view.getUint32(16), view.getUint32(20)];
+    }
+    if (ascii(0, 6) === "GIF87a" || ascii(0, 6) === "GIF89a") {
+        return [view.getUint16(6, true), view.getUint16(8, true)];
+    }
+    if (ascii(0, 4) === "RIFF" && ascii(8, 12) === "WEBP" && bytes.length >= 30) {
+        const chunk = ascii(12, 16);
+        if (chunk === "VP8 " && bytes[23] === 0x9d && bytes[24] === 0x01 && bytes[25] === 0x2a) {
+            return [view.getUint16(26, true) & 0x3fff, view.getUint16(28, true) & 0x3fff];
+        }
+        if (chunk === "VP8L" && bytes[20] === 0x2f) {
+            const bits = view.getUint32(21, true);
+            return [(bits & 0x3fff) + 1, ((bits >>> 14) & 0x3fff) + 1];
+        }
+        if (chunk === "VP8X") {
+            return [(view.getUint32(24, true) & 0xffffff) + 1, (view.getUint32(27, true) & 0xffffff) + 1];
+        }
+        return null;
+    }
+    if (bytes[0] === 0xff && bytes[1] === 0xd8) {
+        return arsp__jpeg_dimensions(view);
+    }
+    return null;
+}
+
+// 🖼 button: image of the current img2img tab (on Batch, the img2img one) -> [width, height, fallback payload].
+// When the header isn't in the first 64 KiB, a larger prefix goes to the server-side header probe instead.
+function arsp__current_tab_image_dims(...args) {
+    const [w, h] = args.slice(-2);
+    const tab_index = get_img2img_tab_index();
+    let image = tab_index == 5 ? args[0] : args[tab_index];
+    if (image && typeof image === "object" && "image" in image) {
+        image = image["image"];
+    }
+    if (!image) {
+        return [0, 0, ""];
+    }
+    const dims = arsp__probe_data_url(image, arsp__probe_prefix_bytes);
+    if (dims) {
+        return [...dims, ""];
+    }
+    // The timestamp makes a repeated payload still count as a change
+    const payload = typeof image === "string" ? arsp__base64_prefix(image, arsp__fallback_prefix_bytes) : "";
+    return [w, h, payload ? `${Date.now()}|${payload}` : ""];
+}
+
+// Preset dispatch mode: preset buttons (arsp__<tab>_<ar|res>_<index>) have no Gradio event of their own.
+// Remember the clicked index and label and fire the tab's single hidden dispatch button, whose _js reads
+// them back. The catalog layout sends the label too, so the server can tell when its presets have changed.
+const arsp__ar_pending_preset = {};
+document.addEventListener("click", function (e) {
+    const button = e.target instanceof Element ? e.target.closest("button[id^='arsp__']") : null;
+    const match = button ? /^arsp__(txt|img)_(ar|res)_(\d+)$/.exec(button.id) : null;
+    if (!match) {
+        return;
+    }
+    const trigger = gradioApp().querySelector(`#arsp__${match[1]}_${match[2]}_dispatch`);
+    if (trigger) {
+        arsp__ar_pending_preset[`${match[1]}_${match[2]}`] = {index: Number(match[3]), label: button.textContent};
+        trigger.click();
+    }
+});
+
+// Searchable catalog layout: only the favorites are Gradio buttons. The selected group, or the search
+// matches, is rendered from arsp__ar_preset_groups with dispatch ids, so clicks go through the listener above.
+const arsp__catalog_max_matches = 60;
+
+let arsp__catalog_cache = null;
+function arsp__catalog() {
+    if (arsp__catalog_cache === null) {
+        const presets = typeof arsp__ar_preset_groups === "undefined" ? {ar: [], res: []} : arsp__ar_preset_groups;
+        const groups = new Map();
+        for (const kind of ["ar", "res"]) {
+            presets[kind].forEach(function ([label, group], index) {
+                const name = group || (kind === "ar" ? "Aspect ratios" : "Resolutions");
+                if (!groups.has(name)) {
+                    groups.set(name, []);
+                }
+                groups.get(name).push({kind, index, label, search: label.toLowerCase()});
+            });
+        }
+        arsp__catalog_cache = groups;
+    }
+    return arsp__catalog_cache;
+}
+
+// Entries to show: the whole group, or up to arsp__catalog_max_matches + 1 matches from every group
+function arsp__catalog_entries(groups, group, query) {
+    query = query.trim().toLowerCase();
+    if (!query) {
+        return groups.get(group) || [];
+    }
+    const titles = arsp__ar_titles();
+    const matches = [];
+    for (const entries of groups.values()) {
+        for (const entry of entries) {
+            if (entry.search.includes(query) || (titles[entry.label] || "").toLowerCase().includes(query)) {
+                matches.push(entry);
+                if (matches.length > arsp__catalog_max_matches) {
+                    return matches;
+                }
+            }
+        }
+    }
+    return matches;
+}
+
+function arsp__catalog_render(state) {
+    const entries = arsp__catalog_entries(arsp__catalog(), state.group.value, state.search.value);
+    const titles = arsp__ar_titles();
+    const fragment = document.createDocumentFragment();
+    entries.slice(0, arsp__catalog_max_matches).forEach(function (entry) {
+        const button = document.createElement("button");
+        button.type = "button";
+        button.id = `arsp__${state.tab}_${entry.kind}_${entry.index}`;
+        button.className = "lg secondary gradio-button tool";
+        button.textContent = entry.label;
+        if (titles[entry.label]) {
+            button.title = titles[entry.label];
+        }
+        fragment.appendChild(button);
+    });
+    if (entries.length > arsp__catalog_max_matches) {
+        const more = document.createElement("span");
+        more.className = "arsp__catalog_more";
+        more.textContent = "…";
+        fragment.appendChild(more);
+    }
+    state.list.replaceChildren(fragment);
+}
+
+function arsp__catalog_setup() {
+    gradioApp().querySelectorAll("#arsp__txt2img_catalog .arsp__catalog, #arsp__img2img_catalog .arsp__catalog").forEach(function (root) {
+        if (root.dataset.ready) {
+            return;
+        }
+        root.dataset.ready = "1";
+
+        const state = {
+            tab: root.closest("#arsp__img2img_catalog") ? "img" : "txt",
+            search: document.createElement("input"),
+            group: document.createElement("select"),
+            list: document.createElement("div"),
+        };
+        state.search.type = "search";
+        state.search.placeholder = "Search presets";
+        for (const name of arsp__catalog().keys()) {
+            const option = document.createElement("option");
+            option.value = option.textContent = name;
+            state.group.appendChild(option);
+        }
+        state.list.className = "arsp__catalog_list";
+
+        state.search.addEventListener("input", () => arsp__catalog_render(state));
+        state.group.addEventListener("change", function () {
+            state.search.value = "";
+            arsp__catalog_render(state);
+        });
+
+        const controls = document.createElement("div");
+        controls.className = "arsp__catalog_controls";
+        controls.append(state.search, state.group);
+        root.append(controls, state.list);
+        arsp__catalog_render(state);
+    });
+}
+
+onUiUpdate(arsp__catalog_setup);
+
+// Lightweight calculator panel: Calc (.arsp__calc_toggle) has no Gradio event, and the calculator is built
+// into the tab's empty arsp__<tab>2img_calc div on its first click. It reads and writes the width/height
+// sliders directly, so none of it is in the page config.
+const arsp__calc_image_ids = ["img2img_image", "img2img_sketch", "img2maskimg", "inpaint_sketch", "img_inpaint_base"];
+
+function arsp__set_tab_number(tab, id, value) {
+    const input = gradioApp().querySelector(`#${tab}2img_${id} input[type=number]`);
+    if (input && value > 0) {
+        input.value = value;
+        updateInput(input);
+    }
+}
+
+// Dimensions of the image on the current img2img tab (on Batch, the img2img one), or null
+function arsp__calc_image_dims() {
+    const tab_index = get_img2img_tab_index();
+    const id = arsp__calc_image_ids[tab_index == 5 ? 0 : tab_index];
+    const image = id ? gradioApp().querySelector(`#${id} img`) : null;
+    if (!image || !image.src) {
+        return null;
+    }
+    return arsp__probe_data_url(image.src, arsp__fallback_prefix_bytes)
+        || (image.naturalWidth ? [image.naturalWidth, image.naturalHeight] : null);
+}
+
+// "Aspect Ratio: **16:9** · ..." as text with <strong> for the bold parts
+function arsp__render_bold(element, text) {
+    element.replaceChildren(...text.split("**").map(function (part, i) {
+        if (i % 2 === 0) {
+            return document.createTextNode(part);
+        }
+        const strong = document.createElement("strong");
+        strong.textContent = part;
+        return strong;
+    }));
+}
+
+function arsp__calc_build(root, tab) {
+    const field = function (label) {
+        const input = document.createElement("input");
+        input.type = "number";
+        input.min = "0";
+        const wrapper = document.createElement("label");
+        wrapper.append(label, input);
+        return [wrapper, input];
+    };
+    const button = function (text, tool, onclick) {
+        const element = document.createElement("button");
+        element.type = "button";
+        element.className = tool ? "lg secondary gradio-button tool" : "lg secondary gradio-button";
+        element.textContent = text;
+        element.addEventListener("click", onclick);
+        return element;
+    };
+    const column = function (...children) {
+        const element = document.createElement("div");
+        element.className = "arsp__calc_column";
+        element.append(...children);
+        return element;
+    };
+
+    const [w1_field, w1] = field("Width 1");
+    const [h1_field, h1] = field("Height 1");
+    const [w2_field, w2] = field("Width 2");
+    const [h2_field, h2] = field("Height 2");
+    const state = {w1, h1, w2, h2, display: document.createElement("div")};
+    state.display.className = "arsp__calc_display";
+    const update = async function () {
+        arsp__render_bold(state.display, await arsp__ar_display(tab, Number(state.w1.value), Number(state.h1.value)));
+    };
+    state.w1.addEventListener("input", update);
+    state.h1.addEventListener("input", update);
+    const set = function (w1, h1) {
+        state.w1.value = w1;
+        state.h1.value = h1;
+        update();
+    };
+
+    const tools = document.createElement("div");
+    tools.className = "arsp__calc_tools";
+    tools.append(
+        button("\u{21c5}", true, function () {
+            [state.w1.value, state.h1.value, state.w2.value, state.h2.value] = [state.h1.value, state.w1.value, state.h2.value, state.w2.value];
+            update();
+        }),
+        button("⬇️", true, () => set(arsp__tab_number(tab, "width", 512), arsp__tab_number(tab, "height", 512))),
+    );
+    if (tab === "img") {
+        tools.append(button("\u{1f5bc}", true, function () {
+            const dims = arsp__calc_image_dims();
+            if (dims) {
+                set(...dims);
+            }
+        }));
+    }
+
+    const actions = document.createElement("div");
+    actions.className = "arsp__calc_actions";
+    actions.append(
+        button("Calculate Height", false, function () {
+            state.h2.value = arsp__calc_height(Number(state.w2.value), Number(state.w1.value), Number(state.h1.value));
+        }),
+        button("Calculate Width", false, function () {
+            state.w2.value = arsp__calc_width(Number(state.h2.value), Number(state.w1.value), Number(state.h1.value));
+        }),
+        button("Apply", false, function () {
+            arsp__set_tab_number(tab, "width", Number(state.w2.value));
+            arsp__set_tab_number(tab, "height", Number(state.h2.value));
+        }),
+    );
+
+    const heading = document.createElement("h4");
+    heading.textContent = "Aspect Ratio Calculator";
+    const fields = document.createElement("div");
+    fields.className = "arsp__calc_fields";
+    fields.append(column(w1_field, h1_field), column(w2_field, h2_field), column(state.display, tools));
+    root.append(heading, fields, actions);
+    state.reset = function () {
+        set(512, 512);
+        state.w2.value = state.h2.value = 0;
+    };
+    return state;
+}
+
+const arsp__calc_state = {};
+document.addEventListener("click", function (e) {
+    const toggle = e.target instanceof Element ? e.target.closest("button.arsp__calc_toggle") : null;
+    const match = toggle ? /^arsp__(txt|img)_calc_toggle$/.exec(toggle.id) : null;
+    if (!match) {
+        return;
+    }
+    const tab = match[1];
+    const container = gradioApp().querySelector(`#arsp__${tab}2img_container_aspect_ratio`);
+    const root = container ? container.querySelector(`#arsp__${tab}2img_calc .arsp__calc`) : null;
+    if (!root) {
+        return;
+    }
+    const open = container.classList.toggle("arsp__calc_open");
+    toggle.classList.toggle("primary", open);
+    toggle.classList.toggle("secondary", !open);
+    if (open) {
+        // Like the full panel, opening starts from 512x512
+        (arsp__calc_state[tab] || (arsp__calc_state[tab] = arsp__calc_build(root, tab))).reset();
+        assignTooltipsToButtons();
+    }
+});
+
+// Size a preset button would set, for its time estimate; null for the bucket modes
+function arsp__preset_size(tab, kind, index) {
+    const presets = typeof arsp__ar_preset_groups === "undefined" ? {ar: [], res: []} : arsp__ar_preset_groups;
+    if (kind === "res") {
+        const preset = presets.res[index];
+        return preset && preset.length >= 4 ? [preset[2], preset[3]] : null;
+    }
+    const ratios = typeof arsp__ar_preset_ratios === "undefined" ? [] : arsp__ar_preset_ratios;
+    const mode = gradioApp().querySelector(`#arsp__${tab}2img_container_aspect_ratio #arsp__arc_ar_mode input`);
+    const w = arsp__tab_number(tab, "width", 512), h = arsp__tab_number(tab, "height", 512);
+    const ar = ratios[index] && ratios[index][1];
+    if (!ar) {
+        return null;
+    }
+    if (!mode || mode.value === "Keep side") {
+        if (ar > 1) {
+            return [arsp__round(ar * h), h];
+        }
+        return ar < 1 ? [w, arsp__round(w / ar)] : [Math.min(w, h), Math.min(w, h)];
+    }
+    if (mode.value === "Keep area") {
+        // Same settings and bounds as area_settings() in scripts/sd-webui-ar.py, from the webui's opts
+        const settings = typeof opts === "undefined" ? {} : opts;
+        const megapixels = Math.min(Number(settings.arsp__area_megapixels) || 0, 256);
+        const area = megapixels > 0 ? arsp__round(megapixels * 1024 * 1024) : w * h;
+        return arsp__apply_pixel_area(ar, area, Math.trunc(Number(settings.arsp__area_multiple) || 64));
+    }
+    return null;
+}
+
+// Preset tooltips gain the resulting size and its estimated time while hovered
+document.addEventListener("mouseover", function (e) {
+    const button = e.target instanceof Element ? e.target.closest("button[id^='arsp__']") : null;
+    const match = button ? /^arsp__(txt|img)_(?:fav_)?(ar|res)_(\d+)$/.exec(button.id) : null;
+    if (!match) {
+        return;
+    }
+    const base = arsp__ar_titles()[button.textContent] || "";
+    const size = arsp__preset_size(match[1], match[2], Number(match[3]));
+    const seconds = size ? arsp__estimate_seconds(match[1], size[0], size[1]) : null;
+    if (seconds !== null) {
+        button.title = `${base}${base ? "\n" : ""}${size[0]}×${size[1]} ${arsp__format_seconds(seconds)}`;
+    }
+});
+
+// Merge the generated preset titles (arsp__button_titles.js) once and reuse the result
+let arsp__ar_titles_cache = null;
+function arsp__ar_titles() {
+    if (arsp__ar_titles_cache === null) {
+        const presets = typeof arsp__ar_preset_titles === "undefined" ? {} : arsp__ar_preset_titles;
+        arsp__ar_titles_cache = Object.assign({}, presets, arsp__ar_button_titles);
+    }
+    return arsp__ar_titles_cache;
+}
+
 // Function to assign tooltips to buttons
 function assignTooltipsToButtons() {
+    const titles = arsp__ar_titles();
     document.querySelectorAll('#arsp__txt2img_container_aspect_ratio button, #arsp__img2img_container_aspect_ratio button').forEach(function (elem) {
-        const tooltip = arsp__ar_button_titles[elem.textContent];
-        if (tooltip) {
+        const tooltip = titles[elem.textContent];
+        if (tooltip && elem.title !== tooltip) {
             elem.title = tooltip;
         }
     });
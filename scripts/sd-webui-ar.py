@@ -1,9 +1,25 @@
 import contextlib
+import json
+import os
+import time
+from functools import partial
 from pathlib import Path
 import gradio as gr
 import modules.scripts as scripts
+from modules import script_callbacks, shared
 from modules.ui_components import ToolButton
-from math import gcd
+from sd_webui_ar.api import MAX_MEGAPIXELS, mount_api
+from sd_webui_ar.assets import atomic_write_bytes, publish_titles
+from sd_webui_ar.batchplan import manifest_path, plan_batch
+from sd_webui_ar.buckets import MODEL_FAMILIES
+from sd_webui_ar.catalog import get_catalog
+from sd_webui_ar.costmodel import CostSample, get_cost_model, record_generation
+from sd_webui_ar.hiresplan import plan_hires
+from sd_webui_ar.imageprobe import probe_dimensions
+from sd_webui_ar.instrument import fast_handler, timed
+from sd_webui_ar.locking import file_lock
+from sd_webui_ar.modes import AR_MODE_KEEP_SIDE, AR_MODES, AREA_MULTIPLE, MEGAPIXEL, apply_preset_ratio
+from sd_webui_ar.watcher import PresetWatcher
 
 aspect_ratios_dir = scripts.basedir()
 
@@ -13,6 +29,15 @@ DIMENSIONS_SYMBOL = "\u2B07\ufe0f"  # ⬇️
 IMAGE_DIMENSIONS_SYMBOL = "\U0001F5BC"  # 🖼
 REVERSE_LOGIC_SYMBOL = "\U0001F503"  # 🔃
 
+PRESET_LAYOUT_BUTTONS = "Buttons"
+PRESET_LAYOUT_CATALOG = "Searchable catalog"
+# Favorites shown in the catalog layout when none are configured
+DEFAULT_FAVORITES = 4
+
+CALCULATOR_FULL = "Full"
+CALCULATOR_LIGHTWEIGHT = "Lightweight"
+CALCULATOR_OFF = "Off"
+
 class ResButton(ToolButton):
     def __init__(self, res=(512, 512), **kwargs):
         super().__init__(**kwargs)
@@ -26,90 +51,138 @@ class ARButton(ToolButton):
         super().__init__(**kwargs)
         self.ar = ar
 
-    def apply(self, w, h):
-        if self.ar > 1.0:
-            w = self.ar * h
-        elif self.ar < 1.0:
-            h = w / self.ar
-        else:
-            min_dim = min([w, h])
-            w, h = min_dim, min_dim
-        return list(map(round, [w, h]))
+    def apply(self, w, h, mode=AR_MODE_KEEP_SIDE):
+        return apply_preset_ratio(self.ar, w, h, mode, **area_settings())
 
     def reset(self, w, h):
         return [self.res, self.res]
 
-def parse_aspect_ratios_file(filename):
-    labels, values, comments = [], [], []
-    file = Path(aspect_ratios_dir, filename)
-
-    if not file.exists():
-        return labels, values, comments
-
-    with open(file, "r", encoding="utf-8") as f:
-        lines = f.readlines()
-
-    if not lines:
-        return labels, values, comments
-
-    for line in lines:
-        if line.startswith("#"):
-            continue
-
-        if ',' not in line:
-            continue
-
-        try:
-            label, value = line.strip().split(",")
-            comment = ""
-            if "#" in value:
-                value, comment = value.split("#")
-        except ValueError:
-            print(f"skipping badly formatted line in aspect ratios file: {line}")
-            continue
-
-        labels.append(label)
-        values.append(eval(value))
-        comments.append(comment)
-
-    return labels, values, comments
-
-def parse_resolutions_file(filename):
-    labels, values, comments = [], [], []
-    file = Path(aspect_ratios_dir, filename)
-
-    if not file.exists():
-        return labels, values, comments
-
-    with open(file, "r", encoding="utf-8") as f:
-        lines = f.readlines()
-
-    if not lines:
-        return labels, values, comments
-
-    for line in lines:
-        if line.startswith("#"):
-            continue
-
-        if ',' not in line:
-            continue
-
-        try:
-            label, width, height = line.strip().split(",")
-            comment = ""
-            if "#" in height:
-                height, comment = height.split("#")
-        except ValueError:
-            print(f"skipping badly formatted line in resolutions file: {line}")
-            continue
-
-        resolution = (width, height)
+def register_fast(event, name, fn, **kwargs):
+    # Pure arithmetic/visibility handlers skip the queue, so they never wait behind
+    # a running generation. They must only use their inputs and immutable captures.
+    return event(fast_handler(name, fn), queue=False, **kwargs)
+
+def register_timed(event, name, fn, **kwargs):
+    # Handlers that read files stay queued, but are counted like the fast ones
+    return event(fast_handler(name, fn), **kwargs)
+
+def area_settings():
+    # Pixel budget and snapping for the keep-area mode; a budget of 0 or less keeps the current area
+    megapixels = min(getattr(shared.opts, "arsp__area_megapixels", 0) or 0, MAX_MEGAPIXELS)
+    return {
+        "area": round(megapixels * MEGAPIXEL) if megapixels > 0 else None,
+        "multiple": int(getattr(shared.opts, "arsp__area_multiple", AREA_MULTIPLE)),
+    }
+
+def area_text(w, h):
+    # Same format as arsp__area_text in sd-webui-ar.js
+    w, h = int(w or 0), int(h or 0)
+    return f"{w}×{h} · {w * h / MEGAPIXEL:.2f} MP"
+
+def dispatch_aspect_ratio(ratios, index, w, h, mode):
+    return apply_preset_ratio(ratios[int(index)], w, h, mode, **area_settings())
+
+def dispatch_resolution(resolutions, index, w, h):
+    return list(resolutions[int(index)])
+
+def catalog_preset(presets, key):
+    # "<index>:<label>" from a catalog button. The page may have loaded an older version
+    # of the preset files, so the index only counts while it still names the same label.
+    index, _, label = str(key).partition(":")
+    with contextlib.suppress(ValueError, IndexError):
+        preset = presets[int(index)]
+        if int(index) >= 0 and preset.label.strip() == label:
+            return preset
+    return next((p for p in presets if p.label.strip() == label), None)
+
+# The catalog layout's buttons come from the published asset, which can be newer or older
+# than the UI, so they are looked up in the current catalog by label
+def dispatch_catalog_aspect_ratio(key, w, h, mode):
+    preset = catalog_preset(read_catalog().aspect_ratios, key)
+    if preset is None:
+        # Removed from the preset files since the page was loaded
+        return [gr.update(), gr.update()]
+    return apply_preset_ratio(preset.value, w, h, mode, **area_settings())
+
+def dispatch_catalog_resolution(key, w, h):
+    preset = catalog_preset(read_catalog().resolutions, key)
+    if preset is None:
+        return [gr.update(), gr.update()]
+    return [preset.width, preset.height]
+
+def favorite_indices(labels, favorites):
+    # Presets named in the comma separated favorites setting, in file order
+    if not favorites.strip():
+        return list(range(min(DEFAULT_FAVORITES, len(labels))))
+    wanted = {f.strip() for f in favorites.split(",")}
+    return [i for i, label in enumerate(labels) if label.strip() in wanted]
+
+def show_calculator():
+    return [
+        gr.update(visible=True),
+        gr.update(visible=False),
+        gr.update(visible=True),
+        gr.update(value=512),
+        gr.update(value=512),
+        gr.update(value=0),
+        gr.update(value=0),
+        gr.update(value="Aspect Ratio: **1:1**"),
+    ]
 
-        labels.append(label)
-        values.append(resolution)
-        comments.append(comment)
+def hide_calculator():
+    return [
+        gr.update(visible=False),
+        gr.update(visible=True),
+        gr.update(visible=False),
+    ]
 
-    return labels, values, comments
+def probe_image_payload(payload):
+    # "<timestamp>|<base64 prefix>" from arsp__current_tab_image_dims
+    data = payload.partition("|")[2] if payload else ""
+    if not data:
+        return gr.update(), gr.update()
+    return probe_dimensions(data) or (0, 0)
+
+def plan_batch_folder(directory, w, h, mode):
+    # Each image keeps its own ratio, applied like an aspect ratio button in the selected mode
+    if not directory or not os.path.isdir(directory):
+        return "**Set an input directory on the Batch tab first**"
+    manifest = manifest_path(Path(aspect_ratios_dir, "batch_manifests"), directory)
+    plan = plan_batch(
+        directory,
+        lambda iw, ih: apply_preset_ratio(iw / ih, w, h, mode, **area_settings()),
+        manifest_file=manifest,
+    )
+    plan_file = manifest.with_suffix(".plan.json")
+    atomic_write_bytes(plan_file, json.dumps(plan.as_dict(), indent=1).encode("utf-8"))
+    return f"{plan.summary()}\n\nFiles grouped by size: `{plan_file}`"
+
+def plan_hires_fix(scale_maximum, resize_maximum, target_w, target_h, family, steps, hr_steps, sampler):
+    if not (target_w and target_h and target_w > 0 and target_h > 0):
+        return [gr.update()] * 6 + ["**Set a target width and height first**"]
+    # Resolution presets that fit the model are candidates alongside its buckets
+    extra = tuple((p.width, p.height) for p in read_catalog().resolutions)
+    plan = plan_hires(target_w, target_h, family, int(steps), int(hr_steps or 0), extra)
+    (w, h), (tw, th) = plan.base, plan.target
+    if not plan.enabled:
+        seconds = get_cost_model(cost_store_file()).estimate(w, h, steps, sampler)
+        return [w, h, gr.update(value=False), gr.update(), gr.update(), gr.update(), plan.summary(seconds)]
+
+    uw, uh = plan.upscaled
+    seconds = get_cost_model(cost_store_file()).estimate(
+        w, h, steps, sampler, hr_width=uw, hr_height=uh, hr_steps=hr_steps or steps
+    )
+    # Targets past the sliders' range (e.g. 4K with SD1.5) widen them rather than being clamped
+    resize_maximum = max(resize_maximum, tw, th)
+    return [
+        w,
+        h,
+        gr.update(value=True),
+        gr.update(value=plan.scale, maximum=max(scale_maximum, plan.scale)),
+        gr.update(value=tw, maximum=resize_maximum),
+        gr.update(value=th, maximum=resize_maximum),
+        plan.summary(seconds),
+    ]
 
 def write_aspect_ratios_file(filename):
     aspect_ratios = [
@@ -141,8 +214,7 @@ def write_aspect_ratios_file(filename):
         "𝜑, 1.6180 # Golden ratio aspect ratio\n",
         "δ, 2.414 # Silver ratio aspect ratio\n"
     ]
-    with open(filename, "w", encoding="utf-8") as f:
-        f.writelines(aspect_ratios)
+    atomic_write_bytes(filename, "".join(aspect_ratios).encode("utf-8"))
 
 def write_resolutions_file(filename):
     resolutions = [
@@ -155,66 +227,79 @@ def write_resolutions_file(filename):
         "XL16:9, 1344, 768\n",
         "XL21:9, 1536, 640\n"
     ]
-    with open(filename, "w", encoding="utf-8") as f:
-        f.writelines(resolutions)
-
-def write_js_titles_file(button_titles):
-    filename = Path(aspect_ratios_dir, "javascript", "button_titles.js")
-    content = [
-        "// Do not put custom titles here. This file is overwritten each time the WebUI is started.\n"
-    ]
-    content.append("ar_button_titles = {\n")
-    counter = 0
-    while counter < len(button_titles[0]):
-        content.append(
-            f'    "{button_titles[0][counter]}" : "{button_titles[1][counter]}",\n'
-        )
-        counter = counter + 1
-    content.append("}")
-
-    with open(filename, "w", encoding="utf-8") as f:
-        f.writelines(content)
-
-def get_reduced_ratio(n, d):
-    n, d = list(map(int, (n, d)))
-
-    if n == d:
-        return "1:1"
-
-    if n < d:
-        div = gcd(d, n)
-    else:
-        div = gcd(n, d)
-
-    w = int(n) // div
-    h = int(d) // div
-
-    if w == 8 and h == 5:
-        w = 16
-        h = 10
-
-    return f"{w}:{h}"
-
-def solve_aspect_ratio(w, h, n, d):
-    if w != 0 and w:
-        return round(w / (n / d))
-    elif h != 0 and h:
-        return round(h * (n / d))
-    else:
-        return 0
+    atomic_write_bytes(filename, "".join(resolutions).encode("utf-8"))
+
+@timed("write_js_titles_file")
+def write_js_titles_file(button_titles, ratios=(), groups=None):
+    labels, comments = button_titles
+    publish_titles(
+        Path(aspect_ratios_dir, "javascript"), dict(zip(labels, comments)), ratios, groups,
+        lock_file=startup_lock_file(),
+    )
+
+def preset_files():
+    return Path(aspect_ratios_dir, "aspect_ratios.txt"), Path(aspect_ratios_dir, "resolutions.txt")
+
+def startup_lock_file():
+    # Held by whichever webui process sharing this directory writes the generated files
+    return Path(aspect_ratios_dir, ".sd-webui-ar.lock")
+
+def read_catalog():
+    ar_file, res_file = preset_files()
+    if not (ar_file.exists() and res_file.exists()):
+        with file_lock(startup_lock_file()):
+            if not ar_file.exists():
+                write_aspect_ratios_file(ar_file)
+
+            if not res_file.exists():
+                write_resolutions_file(res_file)
+
+    # Shared by both tabs; a warm start loads the compiled records from the cache file
+    return get_catalog(ar_file, res_file, Path(aspect_ratios_dir, "presets.cache"))
+
+def cost_store_file():
+    return Path(aspect_ratios_dir, "generation_costs.csv")
+
+def generation_sample(p, seconds):
+    steps = p.steps
+    if getattr(p, "init_images", None) and not getattr(shared.opts, "img2img_fix_steps", False):
+        # img2img only runs the denoised part of the schedule
+        steps = max(1, min(int(steps * (p.denoising_strength or 0)), steps))
+    hr_width = hr_height = hr_steps = 0
+    if getattr(p, "enable_hr", False):
+        hr_width, hr_height = p.hr_upscale_to_x, p.hr_upscale_to_y
+        hr_steps = p.hr_second_pass_steps or p.steps
+    return CostSample(
+        seconds, p.width, p.height, steps, p.n_iter * p.batch_size,
+        hr_width, hr_height, hr_steps, p.sampler_name or "",
+    )
+
+def publish_catalog(catalog):
+    # Tooltips and calculator presets for sd-webui-ar.js (no-op when unchanged)
+    write_js_titles_file(
+        catalog.button_titles(),
+        [(p.label, p.value) for p in catalog.aspect_ratios],
+        {
+            "ar": [[p.label.strip(), p.group] for p in catalog.aspect_ratios],
+            "res": [[p.label.strip(), p.group, p.width, p.height] for p in catalog.resolutions],
+        },
+    )
+
+def reload_presets(changed):
+    # Only the changed file is parsed again; the API routes and the next page
+    # load see the new catalog, the buttons themselves need a UI reload
+    publish_catalog(read_catalog())
+    print(f"reloaded aspect ratio presets from {', '.join(sorted(p.name for p in changed))}")
+
+preset_watcher = None
 
 class AspectRatioScript(scripts.Script):
+    @timed("read_aspect_ratios")
     def read_aspect_ratios(self):
-        ar_file = Path(aspect_ratios_dir, "aspect_ratios.txt")
-        if not ar_file.exists():
-            write_aspect_ratios_file(ar_file)
-
-        (
-            self.aspect_ratio_labels,
-            aspect_ratios,
-            self.aspect_ratio_comments,
-        ) = parse_aspect_ratios_file("aspect_ratios.txt")
-        self.aspect_ratios = list(map(float, aspect_ratios))
+        presets = read_catalog().aspect_ratios
+        self.aspect_ratio_labels = [p.label for p in presets]
+        self.aspect_ratios = [p.value for p in presets]
+        self.aspect_ratio_comments = [p.comment for p in presets]
 
         # TODO: check for duplicates
 
@@ -223,15 +308,12 @@ class AspectRatioScript(scripts.Script):
         # TODO: use comments as tooltips
         # see https://github.com/alemelis/sd-webui-ar/issues/5
 
+    @timed("read_resolutions")
     def read_resolutions(self):
-        res_file = Path(aspect_ratios_dir, "resolutions.txt")
-        if not res_file.exists():
-            write_resolutions_file(res_file)
-
-        self.res_labels, res, self.res_comments = parse_resolutions_file(
-            "resolutions.txt"
-        )
-        self.res = [list(map(int, r)) for r in res]
+        presets = read_catalog().resolutions
+        self.res_labels = [p.label for p in presets]
+        self.res = [[p.width, p.height] for p in presets]
+        self.res_comments = [p.comment for p in presets]
 
     def title(self):
         return "Aspect Ratio picker"
@@ -239,269 +321,444 @@ class AspectRatioScript(scripts.Script):
     def show(self, is_img2img):
         return scripts.AlwaysVisible
 
+    def process(self, p, *args):
+        p.arsp__started = time.perf_counter()
+
+    def postprocess(self, p, processed, *args):
+        # One sample per finished generation for the cost model behind the time estimates
+        started = getattr(p, "arsp__started", None)
+        if started is None or shared.state.interrupted or not getattr(shared.opts, "arsp__record_costs", True):
+            return
+        try:
+            record_generation(cost_store_file(), generation_sample(p, time.perf_counter() - started))
+        except (AttributeError, OSError) as e:
+            print(f"could not record generation time for the aspect ratio picker: {e}")
+
+    def register_dispatch(self, tab, kind, extra_inputs, fn, is_img2img, by_label=False):
+        # One hidden trigger per tab and preset kind; sd-webui-ar.js records which
+        # preset button was clicked and substitutes its index (and with by_label,
+        # "<index>:<label>") as the first input
+        if is_img2img:
+            resolution = [self.i2i_w, self.i2i_h]
+        else:
+            resolution = [self.t2i_w, self.t2i_h]
+
+        pending = f"arsp__ar_pending_preset['{tab}_{kind}']"
+        if by_label:
+            index = gr.Text(value="", visible=False)
+            key = f"`${{{pending}.index}}:${{{pending}.label}}`"
+        else:
+            index = gr.Number(value=-1, precision=0, visible=False)
+            key = f"{pending}.index"
+        trigger = gr.Button(visible=False, elem_id=f"arsp__{tab}_{kind}_dispatch")
+        register_fast(
+            trigger.click,
+            f"{kind}_dispatch",
+            fn,
+            _js=f"(i, ...args) => [{key}, ...args]",
+            inputs=[index, *resolution, *extra_inputs],
+            outputs=resolution,
+        )
+
+    @timed("ui", label=lambda self, is_img2img: "img2img" if is_img2img else "txt2img")
     def ui(self, is_img2img):
+        tab = "img" if is_img2img else "txt"
+        # Only favorites are real buttons; the rest are rendered by sd-webui-ar.js on demand
+        catalog_layout = getattr(shared.opts, "arsp__preset_layout", PRESET_LAYOUT_BUTTONS) == PRESET_LAYOUT_CATALOG
+        favorites = getattr(shared.opts, "arsp__preset_favorites", "")
+        # Route every preset button through one event per tab instead of one event per button
+        dispatch = catalog_layout or getattr(shared.opts, "arsp__preset_dispatch", False)
+
         with gr.Column(
-            elem_id=f'{"img" if is_img2img else "txt"}2img_container_aspect_ratio'
+            elem_id=f'arsp__{"img" if is_img2img else "txt"}2img_container_aspect_ratio'
         ):
             self.read_aspect_ratios()
             with gr.Row(
-                elem_id=f'{"img" if is_img2img else "txt"}2img_row_aspect_ratio'
+                elem_id=f'arsp__{"img" if is_img2img else "txt"}2img_row_aspect_ratio'
             ):
                 gr.HTML(
                     visible=True,
-                    elem_id="arc_empty_space",
+                    elem_id="arsp__arc_empty_space",
+                )
+                arc_ar_mode = gr.Dropdown(
+                    choices=AR_MODES,
+                    value=AR_MODE_KEEP_SIDE,
+                    show_label=False,
+                    container=False,
+                    min_width=130,
+                    elem_id="arsp__arc_ar_mode",
                 )
+                # Current size and pixel area, kept up to date in the browser
+                arc_area = gr.HTML(elem_id=f"arsp__{tab}_area", elem_classes=["arsp__area"])
+                with contextlib.suppress(AttributeError):
+                    if is_img2img:
+                        resolution = [self.i2i_w, self.i2i_h]
+                    else:
+                        resolution = [self.t2i_w, self.t2i_h]
+                    arc_area.value = area_text(*(c.value for c in resolution))
+                    for component in resolution:
+                        component.change(
+                            None,
+                            _js=f"(w, h) => arsp__area_text(w, h, '{tab}')",
+                            inputs=resolution,
+                            outputs=[arc_area],
+                        )
 
                 # Aspect Ratio buttons
-                btns = [
-                    ARButton(ar=ar, value=label)
-                    for ar, label in zip(
-                        self.aspect_ratios,
-                        self.aspect_ratio_labels,
-                    )
-                ]
+                if catalog_layout:
+                    btns = [
+                        ARButton(ar=self.aspect_ratios[i], value=self.aspect_ratio_labels[i], elem_id=f"arsp__{tab}_fav_ar_{i}")
+                        for i in favorite_indices(self.aspect_ratio_labels, favorites)
+                    ]
+                else:
+                    btns = [
+                        ARButton(ar=ar, value=label, elem_id=f"arsp__{tab}_ar_{i}")
+                        for i, (ar, label) in enumerate(
+                            zip(
+                                self.aspect_ratios,
+                                self.aspect_ratio_labels,
+                            )
+                        )
+                    ]
 
                 with contextlib.suppress(AttributeError):
+                    if catalog_layout:
+                        self.register_dispatch(
+                            tab, "ar", [arc_ar_mode], dispatch_catalog_aspect_ratio, is_img2img, by_label=True
+                        )
+                    elif dispatch:
+                        self.register_dispatch(
+                            tab,
+                            "ar",
+                            [arc_ar_mode],
+                            partial(dispatch_aspect_ratio, tuple(self.aspect_ratios)),
+                            is_img2img,
+                        )
+                        btns = []
+
                     for b in btns:
                         if is_img2img:
                             resolution = [self.i2i_w, self.i2i_h]
                         else:
                             resolution = [self.t2i_w, self.t2i_h]
 
-                        b.click(
+                        register_fast(
+                            b.click,
+                            "ar_button",
                             b.apply,
-                            inputs=resolution,
+                            inputs=resolution + [arc_ar_mode],
                             outputs=resolution,
                         )
 
             self.read_resolutions()
             with gr.Row(
-                elem_id=f'{"img" if is_img2img else "txt"}2img_row_resolutions'
+                elem_id=f'arsp__{"img" if is_img2img else "txt"}2img_row_resolutions'
             ):
-                # Toggle calculator display button
-                arc_show_calculator = gr.Button(
-                    value="Calc",
-                    visible=True,
-                    variant="secondary",
-                    elem_id="arc_show_calculator_button",
-                )
-                arc_hide_calculator = gr.Button(
-                    value="Calc",
-                    visible=False,
-                    variant="primary",
-                    elem_id="arc_hide_calculator_button",
-                )
+                calculator = getattr(shared.opts, "arsp__calculator_panel", CALCULATOR_FULL)
+                if calculator == CALCULATOR_FULL:
+                    # Toggle calculator display button
+                    arc_show_calculator = gr.Button(
+                        value="Calc",
+                        visible=True,
+                        variant="secondary",
+                        elem_id="arsp__arc_show_calculator_button",
+                    )
+                    arc_hide_calculator = gr.Button(
+                        value="Calc",
+                        visible=False,
+                        variant="primary",
+                        elem_id="arsp__arc_hide_calculator_button",
+                    )
+                elif calculator == CALCULATOR_LIGHTWEIGHT:
+                    # No Gradio event: sd-webui-ar.js opens and closes the browser-built calculator
+                    gr.Button(
+                        value="Calc",
+                        variant="secondary",
+                        elem_id=f"arsp__{tab}_calc_toggle",
+                        elem_classes=["arsp__calc_toggle"],
+                    )
 
-                btns = [
-                    ResButton(res=res, value=label)
-                    for res, label in zip(self.res, self.res_labels)
-                ]
+                if catalog_layout:
+                    btns = [
+                        ResButton(res=self.res[i], value=self.res_labels[i], elem_id=f"arsp__{tab}_fav_res_{i}")
+                        for i in favorite_indices(self.res_labels, favorites)
+                    ]
+                else:
+                    btns = [
+                        ResButton(res=res, value=label, elem_id=f"arsp__{tab}_res_{i}")
+                        for i, (res, label) in enumerate(zip(self.res, self.res_labels))
+                    ]
                 with contextlib.suppress(AttributeError):
+                    if catalog_layout:
+                        self.register_dispatch(
+                            tab, "res", [], dispatch_catalog_resolution, is_img2img, by_label=True
+                        )
+                    elif dispatch:
+                        self.register_dispatch(
+                            tab,
+                            "res",
+                            [],
+                            partial(dispatch_resolution, tuple(map(tuple, self.res))),
+                            is_img2img,
+                        )
+                        btns = []
+
                     for b in btns:
                         if is_img2img:
                             resolution = [self.i2i_w, self.i2i_h]
                         else:
                             resolution = [self.t2i_w, self.t2i_h]
 
-                        b.click(
+                        register_fast(
+                            b.click,
+                            "res_button",
                             b.reset,
                             outputs=resolution,
                         )
 
-            # Write button_titles.js with labels and comments read from aspect ratios and resolutions files
-            button_titles = [self.aspect_ratio_labels + self.res_labels]
-            button_titles.append(self.aspect_ratio_comments + self.res_comments)
-            write_js_titles_file(button_titles)
-
-            # dummy components needed for JS function
-            dummy_text1 = gr.Text(visible=False)
-            dummy_text2 = gr.Text(visible=False)
-            dummy_text3 = gr.Text(visible=False)
-            dummy_text4 = gr.Text(visible=False)
-
-            # Aspect Ratio Calculator
-            with gr.Column(
-                visible=False, variant="panel", elem_id="arc_panel"
-            ) as arc_panel:
-                arc_title_heading = gr.Markdown(value="#### Aspect Ratio Calculator")
-                with gr.Row():
-                    with gr.Column(min_width=150):
-                        arc_width1 = gr.Number(label="Width 1")
-                        arc_height1 = gr.Number(label="Height 1")
-
-                    with gr.Column(min_width=150):
-                        arc_desired_width = gr.Number(label="Width 2")
-                        arc_desired_height = gr.Number(label="Height 2")
-
-                    with gr.Column(min_width=150):
-                        arc_ar_display = gr.Markdown(value="Aspect Ratio:")
-                        with gr.Row(
-                            elem_id=f'{"img" if is_img2img else "txt"}2img_arc_tool_buttons'
-                        ):
-                            # Switch resolution values button
-                            arc_swap = ToolButton(value=SWITCH_VALUES_SYMBOL)
-                            arc_swap.click(
-                                lambda w, h, w2, h2: (h, w, h2, w2),
-                                inputs=[
-                                    arc_width1,
-                                    arc_height1,
-                                    arc_desired_width,
-                                    arc_desired_height,
-                                ],
-                                outputs=[
-                                    arc_width1,
-                                    arc_height1,
-                                    arc_desired_width,
-                                    arc_desired_height,
-                                ],
-                            )
+            if catalog_layout:
+                # Search box, group selector and the visible group's buttons are built in the browser
+                gr.HTML(
+                    value='<div class="arsp__catalog"></div>',
+                    elem_id=f"arsp__{tab}2img_catalog",
+                )
 
-                            with contextlib.suppress(AttributeError):
-                                # For img2img tab
-                                if is_img2img:
-                                    # Get slider dimensions button
-                                    resolution = [self.i2i_w, self.i2i_h]
-                                    arc_get_img2img_dim = ToolButton(
-                                        value=DIMENSIONS_SYMBOL
-                                    )
-                                    arc_get_img2img_dim.click(
-                                        lambda w, h: (w, h),
-                                        inputs=resolution,
-                                        outputs=[arc_width1, arc_height1],
-                                    )
-
-                                    # Javascript function to select image element from current img2img tab
-                                    current_tab_image = """
-                                        function current_tab_image(...args) {
-                                            const tab_index = get_img2img_tab_index();
-                                            // Get current tab's image (on Batch tab, use image from img2img tab)
-                                            if (tab_index == 5) {
-                                                image = args[0];
-                                            } else {
-                                                image = args[tab_index];
-                                            }
-                                            // On Inpaint tab, select just the image and drop the mask
-                                            if (tab_index == 2 && image !== null) {
-                                                image = image["image"];
-                                            }
-                                            return [image, null, null, null, null];
-                                        }
-
-                                    """
-
-                                    # Get image dimensions
-                                    def get_dims(
-                                        img: list,
-                                        dummy_text1,
-                                        dummy_text2,
-                                        dummy_text3,
-                                        dummy_text4,
-                                    ):
-                                        if img:
-                                            width = img.size[0]
-                                            height = img.size[1]
-                                            return width, height
-                                        else:
-                                            return 0, 0
-
-                                    # Get image dimensions button
-                                    arc_get_image_dim = ToolButton(
-                                        value=IMAGE_DIMENSIONS_SYMBOL
-                                    )
-                                    arc_get_image_dim.click(
-                                        fn=get_dims,
-                                        inputs=self.image,
-                                        outputs=[arc_width1, arc_height1],
-                                        _js=current_tab_image,
-                                    )
-
-                                else:
-                                    # For txt2img tab
-                                    # Get slider dimensions button
-                                    resolution = [self.t2i_w, self.t2i_h]
-                                    arc_get_txt2img_dim = ToolButton(
-                                        value=DIMENSIONS_SYMBOL
-                                    )
-                                    arc_get_txt2img_dim.click(
-                                        lambda w, h: (w, h),
-                                        inputs=resolution,
-                                        outputs=[arc_width1, arc_height1],
-                                    )
-
-                    # Update aspect ratio display on change
-                    arc_width1.change(
-                        lambda w, h: (f"Aspect Ratio: **{get_reduced_ratio(w,h)}**"),
-                        inputs=[arc_width1, arc_height1],
-                        outputs=[arc_ar_display],
-                    )
-                    arc_height1.change(
-                        lambda w, h: (f"Aspect Ratio: **{get_reduced_ratio(w,h)}**"),
-                        inputs=[arc_width1, arc_height1],
-                        outputs=[arc_ar_display],
-                    )
+            # Publish tooltips and calculator presets from the preset files
+            publish_catalog(read_catalog())
+
+            if calculator == CALCULATOR_FULL:
+                self.calculator_panel(is_img2img, arc_ar_mode, arc_show_calculator, arc_hide_calculator)
+            elif calculator == CALCULATOR_LIGHTWEIGHT:
+                # An empty div until the first click of Calc, when sd-webui-ar.js builds the calculator in it
+                gr.HTML(
+                    value='<div class="arsp__calc"></div>',
+                    elem_id=f"arsp__{tab}2img_calc",
+                    elem_classes=["arsp__calc_lazy"],
+                )
+                if is_img2img:
+                    self.batch_plan_row(arc_ar_mode, elem_classes=["arsp__calc_lazy"])
+                else:
+                    self.hires_plan_row(elem_classes=["arsp__calc_lazy"])
 
-                with gr.Row():
-                    # Calculate and Apply buttons
-                    arc_calc_height = gr.Button(value="Calculate Height", scale=0, full_width=False)
+    def calculator_panel(self, is_img2img, arc_ar_mode, arc_show_calculator, arc_hide_calculator):
+        # Hidden carrier for the image header fallback of the JS dimension probe
+        arc_image_payload = gr.Text(visible=False)
 
-                    arc_calc_height.click(
-                        lambda w2, w1, h1: (solve_aspect_ratio(w2, 0, w1, h1)),
-                        inputs=[arc_desired_width, arc_width1, arc_height1],
-                        outputs=[arc_desired_height],
+        # Aspect Ratio Calculator
+        with gr.Column(
+            visible=False, variant="panel", elem_id="arsp__arc_panel"
+        ) as arc_panel:
+            arc_title_heading = gr.Markdown(value="#### Aspect Ratio Calculator")
+            with gr.Row():
+                with gr.Column(min_width=150):
+                    arc_width1 = gr.Number(label="Width 1")
+                    arc_height1 = gr.Number(label="Height 1")
+
+                with gr.Column(min_width=150):
+                    arc_desired_width = gr.Number(label="Width 2")
+                    arc_desired_height = gr.Number(label="Height 2")
+
+                with gr.Column(min_width=150):
+                    arc_ar_display = gr.Markdown(
+                        value="Aspect Ratio:", elem_id="arsp__arc_ar_display_text"
                     )
-                    arc_calc_width = gr.Button(value="Calculate Width", scale=0, full_width=False)
+                    with gr.Row(
+                        elem_id=f'arsp__{"img" if is_img2img else "txt"}2img_arc_tool_buttons'
+                    ):
+                        # Switch resolution values button
+                        arc_swap = ToolButton(value=SWITCH_VALUES_SYMBOL)
+                        arc_swap.click(
+                            None,
+                            _js="(w, h, w2, h2) => [h, w, h2, w2]",
+                            inputs=[
+                                arc_width1,
+                                arc_height1,
+                                arc_desired_width,
+                                arc_desired_height,
+                            ],
+                            outputs=[
+                                arc_width1,
+                                arc_height1,
+                                arc_desired_width,
+                                arc_desired_height,
+                            ],
+                        )
+
+                        with contextlib.suppress(AttributeError):
+                            # For img2img tab
+                            if is_img2img:
+                                # Get slider dimensions button
+                                resolution = [self.i2i_w, self.i2i_h]
+                                arc_get_img2img_dim = ToolButton(
+                                    value=DIMENSIONS_SYMBOL
+                                )
+                                arc_get_img2img_dim.click(
+                                    None,
+                                    _js="(w, h) => [w, h]",
+                                    inputs=resolution,
+                                    outputs=[arc_width1, arc_height1],
+                                )
+
+                                # Get image dimensions button: sd-webui-ar.js reads them from the image
+                                # header in the browser, so the image itself is never uploaded
+                                arc_get_image_dim = ToolButton(
+                                    value=IMAGE_DIMENSIONS_SYMBOL
+                                )
+                                arc_get_image_dim.click(
+                                    None,
+                                    _js="arsp__current_tab_image_dims",
+                                    inputs=[*self.image, arc_width1, arc_height1],
+                                    outputs=[arc_width1, arc_height1, arc_image_payload],
+                                )
+                                # Fallback: the browser sends only a header-sized prefix of the image
+                                register_fast(
+                                    arc_image_payload.change,
+                                    "image_probe",
+                                    probe_image_payload,
+                                    inputs=[arc_image_payload],
+                                    outputs=[arc_width1, arc_height1],
+                                )
+
+                            else:
+                                # For txt2img tab
+                                # Get slider dimensions button
+                                resolution = [self.t2i_w, self.t2i_h]
+                                arc_get_txt2img_dim = ToolButton(
+                                    value=DIMENSIONS_SYMBOL
+                                )
+                                arc_get_txt2img_dim.click(
+                                    None,
+                                    _js="(w, h) => [w, h]",
+                                    inputs=resolution,
+                                    outputs=[arc_width1, arc_height1],
+                                )
+
+                # Update aspect ratio display on change, naming the closest preset.
+                # Runs in the browser (arsp__describe_ratio mirrors describe_ratio), debounced per tab
+                ar_display_js = f"(w, h) => arsp__ar_display('{'img' if is_img2img else 'txt'}', w, h)"
+                arc_width1.change(
+                    None,
+                    _js=ar_display_js,
+                    inputs=[arc_width1, arc_height1],
+                    outputs=[arc_ar_display],
+                )
+                arc_height1.change(
+                    None,
+                    _js=ar_display_js,
+                    inputs=[arc_width1, arc_height1],
+                    outputs=[arc_ar_display],
+                )
+
+            with gr.Row():
+                # Calculate and Apply buttons
+                arc_calc_height = gr.Button(value="Calculate Height", scale=0, full_width=False)
+
+                arc_calc_height.click(
+                    None,
+                    _js="arsp__calc_height",
+                    inputs=[arc_desired_width, arc_width1, arc_height1],
+                    outputs=[arc_desired_height],
+                )
+                arc_calc_width = gr.Button(value="Calculate Width", scale=0, full_width=False)
 
-                    arc_calc_width.click(
-                        lambda h2, w1, h1: (solve_aspect_ratio(0, h2, w1, h1)),
-                        inputs=[arc_desired_height, arc_width1, arc_height1],
-                        outputs=[arc_desired_width],
+                arc_calc_width.click(
+                    None,
+                    _js="arsp__calc_width",
+                    inputs=[arc_desired_height, arc_width1, arc_height1],
+                    outputs=[arc_desired_width],
+                )
+                arc_apply_params = gr.Button(value="Apply")
+                with contextlib.suppress(AttributeError):
+                    if is_img2img:
+                        resolution = [self.i2i_w, self.i2i_h]
+                    else:
+                        resolution = [self.t2i_w, self.t2i_h]
+
+                    arc_apply_params.click(
+                        None,
+                        _js="(w2, h2) => [w2, h2]",
+                        inputs=[arc_desired_width, arc_desired_height],
+                        outputs=resolution,
                     )
-                    arc_apply_params = gr.Button(value="Apply")
-                    with contextlib.suppress(AttributeError):
-                        if is_img2img:
-                            resolution = [self.i2i_w, self.i2i_h]
-                        else:
-                            resolution = [self.t2i_w, self.t2i_h]
 
-                        arc_apply_params.click(
-                            lambda w2, h2: (w2, h2),
-                            inputs=[arc_desired_width, arc_desired_height],
-                            outputs=resolution,
-                        )
+            if is_img2img:
+                self.batch_plan_row(arc_ar_mode)
+            else:
+                self.hires_plan_row()
+
+        # Show calculator pane (and reset number input values)
+        register_fast(
+            arc_show_calculator.click,
+            "show_calculator",
+            show_calculator,
+            inputs=None,
+            outputs=[
+                arc_panel,
+                arc_show_calculator,
+                arc_hide_calculator,
+                arc_width1,
+                arc_height1,
+                arc_desired_width,
+                arc_desired_height,
+                arc_ar_display,
+            ],
+        )
+        # Hide calculator pane
+        register_fast(
+            arc_hide_calculator.click,
+            "hide_calculator",
+            hide_calculator,
+            inputs=None,
+            outputs=[arc_panel, arc_show_calculator, arc_hide_calculator],
+        )
 
-            # Show calculator pane (and reset number input values)
-            arc_show_calculator.click(
-                lambda: [
-                    gr.update(visible=True),
-                    gr.update(visible=False),
-                    gr.update(visible=True),
-                    gr.update(value=512),
-                    gr.update(value=512),
-                    gr.update(value=0),
-                    gr.update(value=0),
-                    gr.update(value="Aspect Ratio: **1:1**"),
-                ],
-                None,
-                [
-                    arc_panel,
-                    arc_show_calculator,
-                    arc_hide_calculator,
-                    arc_width1,
-                    arc_height1,
-                    arc_desired_width,
-                    arc_desired_height,
-                    arc_ar_display,
-                ],
+
+    def batch_plan_row(self, arc_ar_mode, **row_kwargs):
+        # Target size of every image in the Batch tab's input directory, grouped by size
+        with gr.Row(**row_kwargs):
+            arc_plan_batch = gr.Button(value="Plan Batch", scale=0, full_width=False)
+            arc_batch_plan = gr.Markdown(elem_id="arsp__arc_batch_plan")
+        with contextlib.suppress(AttributeError):
+            register_timed(
+                arc_plan_batch.click,
+                "plan_batch",
+                plan_batch_folder,
+                inputs=[self.batch_input_dir, self.i2i_w, self.i2i_h, arc_ar_mode],
+                outputs=[arc_batch_plan],
+            )
+
+    def hires_plan_row(self, **row_kwargs):
+        # Base size and hires. fix upscale for a target output size, applied to the txt2img controls at once
+        with gr.Row(**row_kwargs):
+            arc_hires_width = gr.Number(label="Target width", value=3840, precision=0, min_width=100)
+            arc_hires_height = gr.Number(label="Target height", value=2160, precision=0, min_width=100)
+            arc_hires_family = gr.Dropdown(
+                label="Model", choices=list(MODEL_FAMILIES), value="SDXL", min_width=100
             )
-            # Hide calculator pane
-            arc_hide_calculator.click(
-                lambda: [
-                    gr.update(visible=False),
-                    gr.update(visible=True),
-                    gr.update(visible=False),
+            arc_plan_hires = gr.Button(value="Plan Hires Fix", scale=0, full_width=False)
+            arc_hires_plan = gr.Markdown(elem_id="arsp__arc_hires_plan")
+        with contextlib.suppress(AttributeError):
+            register_timed(
+                arc_plan_hires.click,
+                "plan_hires",
+                partial(plan_hires_fix, self.hr_scale.maximum, self.hr_resize_x.maximum),
+                inputs=[
+                    arc_hires_width,
+                    arc_hires_height,
+                    arc_hires_family,
+                    self.t2i_steps,
+                    self.t2i_hires_steps,
+                    self.t2i_sampler,
+                ],
+                outputs=[
+                    self.t2i_w,
+                    self.t2i_h,
+                    self.enable_hr,
+                    self.hr_scale,
+                    self.hr_resize_x,
+                    self.hr_resize_y,
+                    arc_hires_plan,
                 ],
-                None,
-                [arc_panel, arc_show_calculator, arc_hide_calculator],
             )
 
     # https://github.com/AUTOMATIC1111/stable-diffusion-webui/pull/7456#issuecomment-1414465888
@@ -526,3 +783,116 @@ class AspectRatioScript(scripts.Script):
             self.image.append(component)
         if kwargs.get("elem_id") == "img_inpaint_base":
             self.image.append(component)
+
+        if kwargs.get("elem_id") == "img2img_batch_input_dir":
+            self.batch_input_dir = component
+
+        if kwargs.get("elem_id") == "txt2img_steps":
+            self.t2i_steps = component
+        if kwargs.get("elem_id") == "txt2img_sampling":
+            self.t2i_sampler = component
+        if kwargs.get("elem_id") == "txt2img_hr":
+            self.enable_hr = component
+        if kwargs.get("elem_id") == "txt2img_hr_scale":
+            self.hr_scale = component
+        if kwargs.get("elem_id") == "txt2img_hires_steps":
+            self.t2i_hires_steps = component
+        if kwargs.get("elem_id") == "txt2img_hr_resize_x":
+            self.hr_resize_x = component
+        if kwargs.get("elem_id") == "txt2img_hr_resize_y":
+            self.hr_resize_y = component
+
+def on_ui_settings():
+    section = ("aspect_ratio", "Aspect Ratio picker")
+    shared.opts.add_option(
+        "arsp__preset_dispatch",
+        shared.OptionInfo(
+            False,
+            "Route all preset buttons through a single event per tab (smaller page config for large preset files)",
+            section=section,
+        ).needs_reload_ui(),
+    )
+    shared.opts.add_option(
+        "arsp__area_megapixels",
+        shared.OptionInfo(
+            0,
+            "Pixel budget of the 'Keep area' mode in megapixels (1 = 1024x1024; 0 keeps the current area)",
+            gr.Number,
+            {"minimum": 0, "maximum": MAX_MEGAPIXELS},
+            section=section,
+        ),
+    )
+    shared.opts.add_option(
+        "arsp__area_multiple",
+        shared.OptionInfo(
+            AREA_MULTIPLE,
+            "Round 'Keep area' sizes to multiples of",
+            gr.Radio,
+            {"choices": [8, 16, 32, 64]},
+            section=section,
+        ),
+    )
+    shared.opts.add_option(
+        "arsp__preset_layout",
+        shared.OptionInfo(
+            PRESET_LAYOUT_BUTTONS,
+            "Preset layout (the searchable catalog renders only the selected group, for large preset files)",
+            gr.Radio,
+            {"choices": [PRESET_LAYOUT_BUTTONS, PRESET_LAYOUT_CATALOG]},
+            section=section,
+        ).needs_reload_ui(),
+    )
+    shared.opts.add_option(
+        "arsp__preset_favorites",
+        shared.OptionInfo(
+            "",
+            "Favorite presets pinned above the catalog (comma separated labels; empty for the first few of each file)",
+            section=section,
+        ).needs_reload_ui(),
+    )
+    shared.opts.add_option(
+        "arsp__calculator_panel",
+        shared.OptionInfo(
+            CALCULATOR_FULL,
+            "Calculator panel (lightweight builds it in the browser on the first click of Calc, for a faster startup)",
+            gr.Radio,
+            {"choices": [CALCULATOR_FULL, CALCULATOR_LIGHTWEIGHT, CALCULATOR_OFF]},
+            section=section,
+        ).needs_reload_ui(),
+    )
+    shared.opts.add_option(
+        "arsp__record_costs",
+        shared.OptionInfo(
+            True,
+            "Record generation times to estimate how long each preset takes (generation_costs.csv)",
+            section=section,
+        ),
+    )
+    shared.opts.add_option(
+        "arsp__watch_presets",
+        shared.OptionInfo(
+            True,
+            "Reload aspect_ratios.txt and resolutions.txt when they change (API, tooltips and calculator presets)",
+            section=section,
+        ).needs_restart(),
+    )
+
+def on_app_started(demo, app):
+    global preset_watcher
+
+    # GET /sd-webui-ar/v1/presets and POST /sd-webui-ar/v1/resolve
+    mount_api(app, read_catalog, lambda: get_cost_model(cost_store_file()))
+
+    if preset_watcher is None and getattr(shared.opts, "arsp__watch_presets", True):
+        preset_watcher = PresetWatcher(preset_files(), reload_presets).start()
+
+def on_script_unloaded():
+    # Reload UI runs this file again, and the new module starts its own watcher
+    global preset_watcher
+    if preset_watcher is not None:
+        preset_watcher.stop()
+        preset_watcher = None
+
+script_callbacks.on_ui_settings(on_ui_settings)
+script_callbacks.on_app_started(on_app_started)
+script_callbacks.on_script_unloaded(on_script_unloaded)
@@ -0,0 +1,147 @@
+"""REST routes for clients that call the webui API directly, so they can use
+the presets deployed on a node instead of re-implementing them."""
+import hashlib
+import json
+import threading
+from typing import List, Optional
+
+import numpy as np
+from fastapi import FastAPI, Request, Response
+from pydantic import BaseModel, Field
+
+from sd_webui_ar import instrument
+from sd_webui_ar.batch import apply_aspect_ratios
+from sd_webui_ar.expressions import MAX_RATIO
+from sd_webui_ar.modes import AR_MODE_KEEP_SIDE, AR_MODES, AREA_MULTIPLE, MEGAPIXEL, apply_preset_ratio
+
+API_PREFIX = "/sd-webui-ar/v1"
+MAX_BATCH = 10000
+# Out of range values are rejected with 422, so results are always finite, int64-safe sizes
+MAX_SIDE = 16384
+MAX_MEGAPIXELS = MAX_SIDE * MAX_SIDE / MEGAPIXEL
+
+
+class ResolveItem(BaseModel):
+    width: float = Field(512, gt=0, le=MAX_SIDE)
+    height: float = Field(512, gt=0, le=MAX_SIDE)
+    # Label of an aspect ratio preset, or a raw ratio; a resolution preset ignores both
+    preset: Optional[str] = None
+    ratio: Optional[float] = Field(None, ge=1 / MAX_RATIO, le=MAX_RATIO)
+    resolution: Optional[str] = None
+    mode: str = AR_MODE_KEEP_SIDE
+    # Keep-area mode only: pixel budget (default: width * height) and snapping
+    megapixels: Optional[float] = Field(None, gt=0, le=MAX_MEGAPIXELS)
+    multiple: int = Field(AREA_MULTIPLE, ge=1, le=MAX_SIDE)
+
+
+class ResolveRequest(BaseModel):
+    items: List[ResolveItem]
+
+
+def catalog_payload(catalog):
+    return {
+        "modes": AR_MODES,
+        "aspect_ratios": [
+            {
+                "label": p.label,
+                "value": p.value,
+                "exact": f"{p.exact.numerator}/{p.exact.denominator}",
+                "comment": p.comment.strip(),
+            }
+            for p in catalog.aspect_ratios
+        ],
+        "resolutions": [
+            {"label": p.label, "width": p.width, "height": p.height, "comment": p.comment.strip()}
+            for p in catalog.resolutions
+        ],
+    }
+
+
+_encoded = None
+_encoded_lock = threading.Lock()
+
+
+def encode_catalog(catalog):
+    """(body, etag) for a catalog, serialized once per catalog object."""
+    global _encoded
+    with _encoded_lock:
+        if _encoded is None or _encoded[0] is not catalog:
+            body = json.dumps(catalog_payload(catalog), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+            _encoded = (catalog, body, etag)
+        return _encoded[1], _encoded[2]
+
+
+def etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+
+def resolve_items(catalog, items):
+    """One {"width", "height"} or {"error"} result per item, in order."""
+    ratios = {p.label.strip(): p.value for p in catalog.aspect_ratios}
+    sizes = {p.label.strip(): (p.width, p.height) for p in catalog.resolutions}
+
+    results = [None] * len(items)
+    keep_side = []
+    for i, item in enumerate(items):
+        if item.resolution is not None:
+            size = sizes.get(item.resolution.strip())
+            results[i] = (
+                {"width": size[0], "height": size[1]} if size
+                else {"error": f"unknown resolution preset {item.resolution!r}"}
+            )
+            continue
+
+        ar = item.ratio if item.preset is None else ratios.get(item.preset.strip())
+        if ar is None:
+            results[i] = {"error": f"unknown aspect ratio preset {item.preset!r}" if item.preset else "no preset, ratio or resolution"}
+        elif not ar > 0:
+            results[i] = {"error": "aspect ratio must be positive"}
+        elif item.mode not in AR_MODES:
+            results[i] = {"error": f"unknown mode {item.mode!r}"}
+        elif item.mode == AR_MODE_KEEP_SIDE:
+            keep_side.append((i, item.width, item.height, ar))
+        else:
+            area = round(item.megapixels * MEGAPIXEL) if item.megapixels else None
+            w, h = apply_preset_ratio(ar, item.width, item.height, item.mode, area, item.multiple)
+            results[i] = {"width": w, "height": h}
+
+    # The common case is solved in one vectorized pass
+    if keep_side:
+        index, widths, heights, ars = zip(*keep_side)
+        out_w, out_h = apply_aspect_ratios(np.array(widths), np.array(heights), np.array(ars))
+        for i, w, h in zip(index, out_w.tolist(), out_h.tolist()):
+            results[i] = {"width": w, "height": h}
+    return results
+
+
+def mount_api(app: FastAPI, load_catalog, load_cost_model=None):
+    """Add the preset routes to app. load_catalog returns the current
+    PresetCatalog and is called once per request; load_cost_model, if given,
+    returns the CostModel behind the time estimates."""
+
+    def get_presets(request: Request):
+        body, etag = encode_catalog(load_catalog())
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        return Response(body, media_type="application/json", headers=headers)
+
+    def resolve(req: ResolveRequest, response: Response):
+        if len(req.items) > MAX_BATCH:
+            response.status_code = 413
+            return {"error": f"at most {MAX_BATCH} items per request"}
+        catalog = load_catalog()
+        response.headers["ETag"] = encode_catalog(catalog)[1]
+        return {"results": resolve_items(catalog, req.items)}
+
+    app.add_api_route(f"{API_PREFIX}/presets", get_presets, methods=["GET"])
+    app.add_api_route(f"{API_PREFIX}/resolve", resolve, methods=["POST"])
+    if load_cost_model is not None:
+        app.add_api_route(f"{API_PREFIX}/cost-model", lambda: load_cost_model().as_dict(), methods=["GET"])
+    if instrument.enabled:
+        # Debug only: startup and handler timings
+        app.add_api_route(f"{API_PREFIX}/profile", lambda: instrument.report(), methods=["GET"])
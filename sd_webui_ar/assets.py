@@ -0,0 +1,75 @@
+import contextlib
+import json
+import os
+from pathlib import Path
+
+from sd_webui_ar.locking import file_lock
+
+TITLES_FILE = "arsp__button_titles.js"
+# Name used by earlier versions
+LEGACY_TITLES_FILE = "button_titles.js"
+
+_published = {}
+
+
+def render_titles(titles, ratios=(), groups=None):
+    titles = {
+        label.strip(): comment.strip()
+        for label, comment in titles.items()
+        if comment.strip()
+    }
+    data = json.dumps(titles, separators=(",", ":"), ensure_ascii=True, sort_keys=True)
+    # Label and value of each aspect ratio preset, for the in-browser calculator
+    ratios = json.dumps([list(r) for r in ratios], separators=(",", ":"), ensure_ascii=True)
+    # [label, group] of every preset by kind and index, for the searchable catalog layout
+    groups = json.dumps(groups or {"ar": [], "res": []}, separators=(",", ":"), ensure_ascii=True)
+    return (
+        f"arsp__ar_preset_titles={data};\narsp__ar_preset_ratios={ratios};\n"
+        f"arsp__ar_preset_groups={groups};\n"
+    ).encode("ascii")
+
+
+def atomic_write_bytes(path, data):
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    finally:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(tmp)
+
+
+def publish_titles(directory, titles, ratios=(), groups=None, lock_file=None):
+    """Write the tooltip table (plus the preset ratios used by the calculator
+    and the preset groups used by the catalog layout) as
+    javascript/arsp__button_titles.js.
+
+    The name never changes: the webui lists the extension's scripts once, when
+    it builds the UI, and adds each file's mtime to its URL. The file is only
+    rewritten when its content changes, so browsers keep their cached copy of
+    an unchanged preset set. With lock_file, processes sharing the directory
+    write one at a time.
+    """
+    data = render_titles(titles, ratios, groups)
+    path = Path(directory, TITLES_FILE)
+    key = str(directory)
+    if _published.get(key) == data:
+        return path
+
+    with file_lock(lock_file):
+        try:
+            current = path.read_bytes()
+        except FileNotFoundError:
+            current = None
+        if current != data:
+            atomic_write_bytes(path, data)
+
+        if key not in _published:
+            # Only on the first publish, before the webui lists the scripts to load
+            with contextlib.suppress(FileNotFoundError):
+                Path(directory, LEGACY_TITLES_FILE).unlink()
+
+    _published[key] = data
+    return path
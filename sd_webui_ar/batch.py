@@ -0,0 +1,103 @@
+"""Array versions of the functions in sd_webui_ar.calc.
+
+Each function gives exactly the results of calling its scalar counterpart
+element by element: the same float64 operations in the same order, and
+np.rint, which rounds half to even like round().
+"""
+import numpy as np
+
+
+def _as_float(*arrays):
+    return np.broadcast_arrays(*(np.asarray(a, dtype=np.float64) for a in arrays))
+
+
+def snap_to_multiples(values, multiple):
+    values = np.asarray(values)
+    if not multiple or multiple <= 1:
+        return np.rint(values).astype(np.int64)
+    snapped = np.rint(values / multiple) * multiple
+    return np.maximum(multiple, snapped).astype(np.int64)
+
+
+def apply_aspect_ratios(widths, heights, ratios, multiple=None):
+    """Batch apply_aspect_ratio(). Returns (widths, heights) as int64 arrays,
+    optionally snapped like snap_to_multiple()."""
+    w, h, ar = _as_float(widths, heights, ratios)
+    if np.any(ar <= 0):
+        raise ValueError("aspect ratios must be positive")
+
+    wide = ar > 1.0
+    tall = ar < 1.0
+    square = ~(wide | tall)
+    min_dim = np.minimum(w, h)
+
+    out_w = np.where(wide, ar * h, w)
+    out_h = np.where(tall, w / ar, h)
+    out_w = np.where(square, min_dim, out_w)
+    out_h = np.where(square, min_dim, out_h)
+
+    out_w = np.rint(out_w).astype(np.int64)
+    out_h = np.rint(out_h).astype(np.int64)
+    if multiple:
+        out_w = snap_to_multiples(out_w, multiple)
+        out_h = snap_to_multiples(out_h, multiple)
+    return out_w, out_h
+
+
+def solve_aspect_ratios(widths, heights, n, d):
+    """Batch solve_aspect_ratio(). A zero width falls back to the height, and
+    zero for both gives 0."""
+    w, h, n, d = _as_float(widths, heights, n, d)
+    if np.any(d == 0):
+        raise ZeroDivisionError("aspect ratio denominator is zero")
+
+    ratio = n / d
+    with np.errstate(divide="ignore", invalid="ignore"):
+        by_width = w / ratio
+    by_height = h * ratio
+
+    solved = np.where(w != 0, by_width, np.where(h != 0, by_height, 0.0))
+    return np.rint(solved).astype(np.int64)
+
+
+def reduce_ratios(n, d):
+    """Batch reduce_ratio(). Returns (numerators, denominators) as int64
+    arrays, with 8:5 reported as 16:10."""
+    n, d = np.broadcast_arrays(
+        np.asarray(n).astype(np.int64), np.asarray(d).astype(np.int64)
+    )
+
+    equal = n == d
+    div = np.gcd(n, d)
+    div = np.where(equal, 1, div)
+
+    w = np.where(equal, 1, n // div)
+    h = np.where(equal, 1, d // div)
+
+    sixteen_ten = (w == 8) & (h == 5)
+    w = np.where(sixteen_ten, 16, w)
+    h = np.where(sixteen_ten, 10, h)
+    return w, h
+
+
+def format_ratios(w, h):
+    return [f"{a}:{b}" for a, b in zip(w.tolist(), h.tolist())]
+
+
+def nearest_presets(index, ratios):
+    """Batch RatioIndex.nearest(). Returns (positions into index.presets,
+    relative errors of those presets against ratios)."""
+    if not index.presets:
+        raise LookupError("ratio index is empty")
+
+    keys = np.asarray(index.keys)
+    values = np.asarray([p.value for p in index.presets])
+    ratios = np.asarray(ratios, dtype=np.float64)
+    target = np.log(ratios)
+
+    # Candidates on either side of the insertion point; ties go left like bisect
+    right = np.clip(np.searchsorted(keys, target), 0, len(keys) - 1)
+    left = np.maximum(right - 1, 0)
+    take_left = (target - keys[left]) <= (keys[right] - target)
+    i = np.where(take_left, left, right)
+    return i, values[i] / ratios - 1
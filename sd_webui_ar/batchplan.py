@@ -0,0 +1,138 @@
+"""Target sizes for a folder of images, such as the img2img batch input.
+
+Dimensions come from image headers (sd_webui_ar.imageprobe), read by a
+thread pool, and are cached in a manifest keyed by file name, mtime and
+size, so a rescan only opens new or changed files.
+"""
+import hashlib
+import os
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from sd_webui_ar.assets import atomic_write_bytes
+from sd_webui_ar.imageprobe import probe_file
+
+MANIFEST_FORMAT = 1
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp", ".gif"}
+MAX_WORKERS = 32
+
+
+class BatchPlan:
+    __slots__ = ("directory", "groups", "unreadable", "scanned", "probed")
+
+    def __init__(self, directory, groups, unreadable, scanned, probed):
+        self.directory = directory
+        # (width, height) -> file names, largest group first
+        self.groups = groups
+        self.unreadable = unreadable
+        self.scanned = scanned
+        self.probed = probed
+
+    def as_dict(self):
+        return {
+            "directory": str(self.directory),
+            "groups": [
+                {"width": w, "height": h, "files": files}
+                for (w, h), files in self.groups.items()
+            ],
+            "unreadable": self.unreadable,
+        }
+
+    def summary(self, limit=6):
+        images = sum(len(files) for files in self.groups.values())
+        sizes = ", ".join(
+            f"{w}×{h} ({len(files)})" for (w, h), files in list(self.groups.items())[:limit]
+        )
+        if len(self.groups) > limit:
+            sizes += ", …"
+        text = f"**{images} images · {len(self.groups)} sizes**: {sizes}" if images else "**No images found**"
+        if self.unreadable:
+            text += f" · {len(self.unreadable)} unreadable"
+        return text + f" · {self.probed} of {self.scanned} files read"
+
+
+def manifest_path(manifest_dir, directory):
+    digest = hashlib.sha1(str(Path(directory).resolve()).encode("utf-8")).hexdigest()[:16]
+    return Path(manifest_dir, f"{digest}.manifest")
+
+
+def load_manifest(path, directory):
+    try:
+        with open(path, "rb") as f:
+            data = pickle.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        print(f"ignoring unreadable batch manifest {path}: {e}")
+        return {}
+    if data.get("format") != MANIFEST_FORMAT or data.get("directory") != str(directory):
+        return {}
+    return data["entries"]
+
+
+def scan_dimensions(directory, manifest_file=None, workers=None):
+    """{file name: (width, height) or None} for the images in directory, and
+    the number of files whose headers had to be read."""
+    directory = Path(directory)
+    files = {}
+    with os.scandir(directory) as it:
+        for entry in it:
+            if entry.is_file() and os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS:
+                stat = entry.stat()
+                files[entry.name] = (stat.st_mtime_ns, stat.st_size)
+
+    cached = load_manifest(manifest_file, directory) if manifest_file else {}
+    entries = {}
+    changed = []
+    for name, signature in files.items():
+        entry = cached.get(name)
+        if entry is not None and entry[0] == signature:
+            entries[name] = entry
+        else:
+            changed.append((name, signature))
+
+    def probe(item):
+        name, signature = item
+        try:
+            return name, (signature, probe_file(directory / name))
+        except OSError:
+            return name, (signature, None)
+
+    if changed:
+        workers = workers or min(MAX_WORKERS, (os.cpu_count() or 1) * 4)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            entries.update(pool.map(probe, changed))
+
+    if manifest_file and (changed or len(entries) != len(cached)):
+        Path(manifest_file).parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_bytes(
+            manifest_file,
+            pickle.dumps(
+                {"format": MANIFEST_FORMAT, "directory": str(directory), "entries": entries},
+                protocol=pickle.HIGHEST_PROTOCOL,
+            ),
+        )
+    return {name: entry[1] for name, entry in entries.items()}, len(changed)
+
+
+def plan_batch(directory, target, manifest_file=None, workers=None):
+    """Group the images in directory by target(width, height), which returns
+    the (width, height) to generate at."""
+    dimensions, probed = scan_dimensions(directory, manifest_file, workers)
+    groups = {}
+    unreadable = []
+    targets = {}
+    for name in sorted(dimensions):
+        dims = dimensions[name]
+        if dims is None or 0 in dims:
+            unreadable.append(name)
+            continue
+        # Many images share a size, and target() may be a bucket search
+        size = targets.get(dims)
+        if size is None:
+            size = targets[dims] = tuple(target(*dims))
+        groups.setdefault(size, []).append(name)
+
+    groups = dict(sorted(groups.items(), key=lambda item: -len(item[1])))
+    return BatchPlan(Path(directory), groups, unreadable, len(dimensions), probed)
@@ -0,0 +1,90 @@
+from bisect import bisect_left
+from functools import lru_cache
+from math import log
+
+
+class ModelFamily:
+    __slots__ = ("name", "budget", "multiple", "min_side", "max_side")
+
+    def __init__(self, name, budget, multiple=64, min_side=None, max_side=None):
+        self.name = name
+        self.budget = budget
+        self.multiple = multiple
+        side = int(budget ** 0.5)
+        self.min_side = min_side or side // 2
+        self.max_side = max_side or side * 2
+
+
+MODEL_FAMILIES = {
+    family.name: family
+    for family in (
+        ModelFamily("SD1.5", 512 * 512),
+        ModelFamily("SD2", 768 * 768),
+        ModelFamily("SDXL", 1024 * 1024),
+    )
+}
+
+
+class BucketIndex:
+    """Resolutions sorted by log aspect ratio, so the bucket closest to a
+    ratio is found with one bisect."""
+
+    __slots__ = ("sizes", "keys")
+
+    def __init__(self, sizes):
+        self.sizes = sorted(set(sizes), key=lambda s: (s[0] / s[1], -s[0] * s[1]))
+        self.keys = [log(w / h) for w, h in self.sizes]
+
+    def __len__(self):
+        return len(self.sizes)
+
+    def nearest(self, ratio):
+        if not self.sizes:
+            raise LookupError("bucket index is empty")
+
+        key = log(ratio)
+        i = bisect_left(self.keys, key)
+        if i == len(self.keys):
+            return self.sizes[-1]
+        if i > 0 and key - self.keys[i - 1] <= self.keys[i] - key:
+            # Equal keys sort largest area first, so step back to the first of a run
+            j = bisect_left(self.keys, self.keys[i - 1])
+            return self.sizes[j]
+        return self.sizes[i]
+
+
+def generate_buckets(family, budget=None):
+    """Every (w, h) in multiples of family.multiple with the largest height
+    that keeps w * h within the pixel budget, in both orientations."""
+    budget = budget or family.budget
+    m = family.multiple
+    sizes = []
+    for w in range(family.min_side - family.min_side % m, family.max_side + 1, m):
+        if w <= 0:
+            continue
+        h = budget // w // m * m
+        if family.min_side <= h <= family.max_side:
+            sizes += [(w, h), (h, w)]
+    return sizes
+
+
+@lru_cache(maxsize=32)
+def bucket_index(family_name, budget=None, extra=()):
+    """Cached index for a model family. extra adds known-good sizes, such as
+    resolution presets, when they are multiples of the family's latent size
+    and within a quarter of its pixel budget."""
+    family = MODEL_FAMILIES[family_name]
+    budget = budget or family.budget
+    sizes = generate_buckets(family, budget)
+    sizes += [
+        (w, h)
+        for w, h in extra
+        if w % family.multiple == 0
+        and h % family.multiple == 0
+        and abs(w * h - budget) <= budget // 4
+    ]
+    return BucketIndex(sizes)
+
+
+def nearest_bucket(ratio, family_name, budget=None, extra=()):
+    return bucket_index(family_name, budget, tuple(extra)).nearest(ratio)
@@ -0,0 +1,60 @@
+from math import gcd
+
+
+def apply_aspect_ratio(ar, w, h):
+    if ar > 1.0:
+        w = ar * h
+    elif ar < 1.0:
+        h = w / ar
+    else:
+        min_dim = min([w, h])
+        w, h = min_dim, min_dim
+    return list(map(round, [w, h]))
+
+
+def reduce_ratio(n, d):
+    n, d = list(map(int, (n, d)))
+
+    if n == d:
+        return 1, 1
+
+    if n < d:
+        div = gcd(d, n)
+    else:
+        div = gcd(n, d)
+
+    w = int(n) // div
+    h = int(d) // div
+
+    if w == 8 and h == 5:
+        w = 16
+        h = 10
+
+    return w, h
+
+
+def get_reduced_ratio(n, d):
+    w, h = reduce_ratio(n, d)
+    return f"{w}:{h}"
+
+
+def solve_aspect_ratio(w, h, n, d):
+    if w != 0 and w:
+        return round(w / (n / d))
+    elif h != 0 and h:
+        return round(h * (n / d))
+    else:
+        return 0
+
+
+def snap_to_multiple(value, multiple):
+    if not multiple or multiple <= 1:
+        return round(value)
+    return max(multiple, round(value / multiple) * multiple)
+
+
+def apply_pixel_area(ar, area, multiple=None):
+    """(w, h) with ratio ar and about area pixels, each side snapped to multiple."""
+    w = (area * ar) ** 0.5
+    h = (area / ar) ** 0.5
+    return [snap_to_multiple(w, multiple), snap_to_multiple(h, multiple)]
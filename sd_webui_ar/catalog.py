@@ -0,0 +1,334 @@
+import hashlib
+import json
+import os
+import struct
+import threading
+from fractions import Fraction
+from pathlib import Path
+
+from sd_webui_ar.assets import atomic_write_bytes
+from sd_webui_ar.expressions import RatioExpressionError, compile_ratios
+from sd_webui_ar.locking import file_lock
+
+# Bump whenever the record layout changes so stale cache files are ignored
+CACHE_FORMAT = 4
+
+
+class AspectRatioPreset:
+    __slots__ = ("label", "value", "exact", "comment", "group")
+
+    def __init__(self, label, exact, comment="", group=""):
+        self.label = label
+        self.exact = exact
+        self.value = float(exact)
+        self.comment = comment
+        self.group = group
+
+    def __repr__(self):
+        return f"AspectRatioPreset({self.label!r}, {self.value!r})"
+
+
+class ResolutionPreset:
+    __slots__ = ("label", "width", "height", "comment", "group")
+
+    def __init__(self, label, width, height, comment="", group=""):
+        self.label = label
+        self.width = width
+        self.height = height
+        self.comment = comment
+        self.group = group
+
+    def __repr__(self):
+        return f"ResolutionPreset({self.label!r}, {self.width}, {self.height})"
+
+
+class PresetCatalog:
+    __slots__ = ("aspect_ratios", "resolutions")
+
+    def __init__(self, aspect_ratios=(), resolutions=()):
+        self.aspect_ratios = tuple(aspect_ratios)
+        self.resolutions = tuple(resolutions)
+
+    def button_titles(self):
+        presets = self.aspect_ratios + self.resolutions
+        return [p.label for p in presets], [p.comment for p in presets]
+
+
+def group_header(line):
+    """Name of the group started by a "[name]" line, or None."""
+    line = line.strip()
+    if line.startswith("[") and line.endswith("]"):
+        return line[1:-1].strip()
+    return None
+
+
+def parse_aspect_ratios(lines):
+    entries = []
+    group = ""
+    for lineno, line in enumerate(lines, 1):
+        if line.startswith("#"):
+            continue
+
+        header = group_header(line)
+        if header is not None:
+            group = header
+            continue
+
+        if ',' not in line:
+            continue
+
+        try:
+            label, value = line.strip().split(",")
+            comment = ""
+            if "#" in value:
+                value, comment = value.split("#")
+        except ValueError:
+            print(f"skipping badly formatted line {lineno} in aspect ratios file: {line}")
+            continue
+
+        entries.append((lineno, label, value, comment, group))
+
+    # Evaluate every distinct ratio expression once, without eval()
+    ratios = compile_ratios(
+        [entry[2] for entry in entries],
+        linenos=[entry[0] for entry in entries],
+    )
+
+    presets = []
+    for (_, label, _, comment, group), ratio in zip(entries, ratios):
+        if isinstance(ratio, RatioExpressionError):
+            print(f"skipping invalid ratio in aspect ratios file: {ratio}")
+            continue
+        presets.append(AspectRatioPreset(label, ratio, comment, group))
+
+    return tuple(presets)
+
+
+def parse_resolutions(lines):
+    presets = []
+    group = ""
+    for lineno, line in enumerate(lines, 1):
+        if line.startswith("#"):
+            continue
+
+        header = group_header(line)
+        if header is not None:
+            group = header
+            continue
+
+        if ',' not in line:
+            continue
+
+        try:
+            label, width, height = line.strip().split(",")
+            comment = ""
+            if "#" in height:
+                height, comment = height.split("#")
+            width, height = int(width), int(height)
+        except ValueError:
+            print(f"skipping badly formatted line {lineno} in resolutions file: {line}")
+            continue
+
+        presets.append(ResolutionPreset(label, width, height, comment, group))
+
+    return tuple(presets)
+
+
+class CatalogCache:
+    """Builds a PresetCatalog once per process and persists the parsed records.
+
+    Entries are keyed by file path and validated against mtime and size first,
+    then against a SHA-256 of the file contents, so a touched but unchanged
+    file is still a hit. A hit never parses text.
+
+    The cache file is shared by every webui process using the extension
+    directory. Misses are compiled under a file lock, so when several
+    processes start together one parses and the others load its result.
+    Each process still reads the file and decodes its JSON blobs into its
+    own records; only the text parsing is saved.
+    """
+
+    def __init__(self, cache_file=None):
+        self.cache_file = Path(cache_file) if cache_file else None
+        self.lock_file = Path(f"{cache_file}.lock") if cache_file else None
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = None
+        self._dirty = False
+        self._memo = {}
+        self._catalog = None
+
+    def load(self, aspect_ratios_file, resolutions_file):
+        with self._lock:
+            files = ((aspect_ratios_file, parse_aspect_ratios), (resolutions_file, parse_resolutions))
+            records = [self._memo_records(path) for path, _ in files]
+            if None in records:
+                with file_lock(self.lock_file):
+                    # Another process may have compiled these files while we waited
+                    self._entries = None
+                    records = [
+                        self._records(path, parse) if found is None else found
+                        for found, (path, parse) in zip(records, files)
+                    ]
+                    if self._dirty:
+                        self._save()
+            aspect_ratios, resolutions = records
+
+            catalog = self._catalog
+            if (
+                catalog is None
+                or catalog.aspect_ratios is not aspect_ratios
+                or catalog.resolutions is not resolutions
+            ):
+                catalog = self._catalog = PresetCatalog(aspect_ratios, resolutions)
+            return catalog
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+    def _memo_records(self, path):
+        """Records parsed earlier in this process, () for a missing file, or
+        None if the file has to be looked up."""
+        key = str(path)
+        try:
+            stat = os.stat(key)
+        except FileNotFoundError:
+            self._memo.pop(key, None)
+            return ()
+
+        memo = self._memo.get(key)
+        if memo is not None and memo[0] == (stat.st_mtime_ns, stat.st_size):
+            self.hits += 1
+            return memo[1]
+        return None
+
+    def _records(self, path, parse):
+        key = str(path)
+        try:
+            stat = os.stat(key)
+        except FileNotFoundError:
+            self._memo.pop(key, None)
+            return ()
+        signature = (stat.st_mtime_ns, stat.st_size)
+
+        # Entries are (signature, digest, records, encoded): records once parsed or
+        # decoded here, encoded as (kind, blob) once read from or written to the file
+        entry = self._load_entries().get(key)
+        if entry is not None and entry[0] == signature:
+            self.hits += 1
+            records = entry[2] if entry[2] is not None else _decode_records(*entry[3])
+        else:
+            data = Path(key).read_bytes()
+            digest = hashlib.sha256(data).hexdigest()
+            if entry is not None and entry[1] == digest:
+                self.hits += 1
+                records = entry[2] if entry[2] is not None else _decode_records(*entry[3])
+                self._entries[key] = (signature, digest, records, entry[3])
+            else:
+                self.misses += 1
+                records = parse(data.decode("utf-8").splitlines(True))
+                self._entries[key] = (signature, digest, records, None)
+            self._dirty = True
+
+        self._memo[key] = (signature, records)
+        return records
+
+    def _load_entries(self):
+        if self._entries is None:
+            self._entries = {}
+            if self.cache_file is not None:
+                try:
+                    self._entries = _read_cache_file(self.cache_file)
+                except FileNotFoundError:
+                    pass
+                except Exception as e:
+                    print(f"ignoring unreadable aspect ratio cache {self.cache_file}: {e}")
+        return self._entries
+
+    def _save(self):
+        self._dirty = False
+        if self.cache_file is None:
+            return
+
+        index = {}
+        blobs = []
+        offset = 0
+        for key, (signature, digest, records, encoded) in self._entries.items():
+            kind, blob = encoded or _encode_records(records)
+            index[key] = [*signature, digest, kind, offset, len(blob)]
+            blobs.append(blob)
+            offset += len(blob)
+        index = json.dumps(index, ensure_ascii=False).encode("utf-8")
+        try:
+            atomic_write_bytes(
+                self.cache_file,
+                _HEADER.pack(_MAGIC, CACHE_FORMAT, len(index)) + index + b"".join(blobs),
+            )
+        except OSError as e:
+            print(f"could not write aspect ratio cache {self.cache_file}: {e}")
+
+
+# Cache file layout: header, JSON index {path: [mtime_ns, size, sha256, kind, offset, length]},
+# then one JSON blob of record fields per preset file
+_MAGIC = b"ARSPCAT\0"
+_HEADER = struct.Struct("<8sII")
+
+
+def _encode_records(records):
+    if records and isinstance(records[0], AspectRatioPreset):
+        kind = "ar"
+        rows = [[p.label, p.exact.numerator, p.exact.denominator, p.comment, p.group] for p in records]
+    else:
+        kind = "res"
+        rows = [[p.label, p.width, p.height, p.comment, p.group] for p in records]
+    return kind, json.dumps(rows, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _decode_records(kind, blob):
+    rows = json.loads(blob)
+    if kind == "ar":
+        return tuple(
+            AspectRatioPreset(label, Fraction(n, d), comment, group)
+            for label, n, d, comment, group in rows
+        )
+    return tuple(ResolutionPreset(*row) for row in rows)
+
+
+def _read_cache_file(path):
+    """{path: (signature, digest, None, (kind, blob))} from a cache file."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < _HEADER.size:
+        return {}
+    magic, version, index_length = _HEADER.unpack_from(data)
+    if magic != _MAGIC or version != CACHE_FORMAT:
+        return {}
+    base = _HEADER.size + index_length
+    index = json.loads(data[_HEADER.size:base])
+    return {
+        key: ((mtime_ns, size), digest, None, (kind, data[base + offset:base + offset + length]))
+        for key, (mtime_ns, size, digest, kind, offset, length) in index.items()
+    }
+
+
+_shared_caches = {}
+_shared_lock = threading.Lock()
+
+
+def get_catalog(aspect_ratios_file, resolutions_file, cache_file=None):
+    key = str(cache_file) if cache_file else None
+    with _shared_lock:
+        cache = _shared_caches.get(key)
+        if cache is None:
+            cache = _shared_caches[key] = CatalogCache(cache_file)
+    return cache.load(aspect_ratios_file, resolutions_file)
+
+
+def cache_stats():
+    with _shared_lock:
+        caches = list(_shared_caches.values())
+    return {
+        "hits": sum(c.hits for c in caches),
+        "misses": sum(c.misses for c in caches),
+    }
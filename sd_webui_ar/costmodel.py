@@ -0,0 +1,209 @@
+"""Generation cost model: seconds as a linear function of work, where work
+is pixels x steps x images summed over the passes of a generation.
+
+Samples are appended to a small CSV file, one line per generation, which is
+cut back to the most recent samples from time to time. The fit keeps running
+sums, so adding a sample and estimating are both O(1).
+"""
+import contextlib
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+from sd_webui_ar.assets import atomic_write_bytes
+from sd_webui_ar.locking import file_lock
+
+# Only the most recent samples are fitted, so the model follows hardware and setting changes
+MAX_SAMPLES = 500
+# The store is cut back to MAX_SAMPLES lines past this size, about four times as many typical lines
+COMPACT_BYTES = 4 * MAX_SAMPLES * 64
+# A sampler gets its own coefficients once it has this many samples
+MIN_SAMPLER_SAMPLES = 5
+
+_FIELDS = ("timestamp", "seconds", "width", "height", "steps", "images", "hr_width", "hr_height", "hr_steps", "sampler")
+
+
+class CostSample:
+    __slots__ = _FIELDS
+
+    def __init__(self, seconds, width, height, steps, images=1, hr_width=0, hr_height=0, hr_steps=0, sampler="", timestamp=None):
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self.seconds = seconds
+        self.width = width
+        self.height = height
+        self.steps = steps
+        self.images = images
+        self.hr_width = hr_width
+        self.hr_height = hr_height
+        self.hr_steps = hr_steps
+        self.sampler = sampler
+
+    @property
+    def work(self):
+        return generation_work(self.width, self.height, self.steps, self.images, self.hr_width, self.hr_height, self.hr_steps)
+
+    def to_line(self):
+        sampler = self.sampler.replace(",", " ").replace("\n", " ")
+        return (
+            f"{self.timestamp:.0f},{self.seconds:.3f},{self.width},{self.height},{self.steps},"
+            f"{self.images},{self.hr_width},{self.hr_height},{self.hr_steps},{sampler}\n"
+        )
+
+    @classmethod
+    def from_line(cls, line):
+        timestamp, seconds, *ints, sampler = line.rstrip("\n").split(",")
+        width, height, steps, images, hr_width, hr_height, hr_steps = map(int, ints)
+        return cls(float(seconds), width, height, steps, images, hr_width, hr_height, hr_steps, sampler, float(timestamp))
+
+
+def generation_work(width, height, steps, images=1, hr_width=0, hr_height=0, hr_steps=0):
+    return (width * height * steps + hr_width * hr_height * hr_steps) * images
+
+
+class LinearFit:
+    """Least squares seconds = intercept + slope * work from running sums."""
+
+    __slots__ = ("n", "sx", "sy", "sxx", "sxy")
+
+    def __init__(self):
+        self.n = 0
+        self.sx = self.sy = self.sxx = self.sxy = 0.0
+
+    def add(self, x, y, sign=1):
+        self.n += sign
+        self.sx += sign * x
+        self.sy += sign * y
+        self.sxx += sign * x * x
+        self.sxy += sign * x * y
+
+    def coefficients(self):
+        if self.n == 0 or self.sx <= 0:
+            return None
+        denominator = self.n * self.sxx - self.sx * self.sx
+        if self.n >= 2 and denominator > 1e-9 * self.n * self.sxx:
+            slope = (self.n * self.sxy - self.sx * self.sy) / denominator
+            intercept = (self.sy - slope * self.sx) / self.n
+            if slope > 0 and intercept >= 0:
+                return intercept, slope
+        # Too few distinct sizes for a line, or a nonsensical one: fit through the origin
+        return 0.0, max(self.sxy / self.sxx, 0.0)
+
+
+class CostModel:
+    def __init__(self, samples=(), max_samples=MAX_SAMPLES):
+        self.samples = deque()
+        self.max_samples = max_samples
+        self.all = LinearFit()
+        self.samplers = {}
+        self._lock = threading.Lock()
+        for sample in samples:
+            self.add(sample)
+
+    def add(self, sample):
+        if sample.seconds <= 0 or sample.work <= 0:
+            return
+        with self._lock:
+            self._update(sample, 1)
+            self.samples.append(sample)
+            if len(self.samples) > self.max_samples:
+                self._update(self.samples.popleft(), -1)
+
+    def _update(self, sample, sign):
+        work = sample.work
+        self.all.add(work, sample.seconds, sign)
+        fit = self.samplers.get(sample.sampler)
+        if fit is None:
+            fit = self.samplers[sample.sampler] = LinearFit()
+        fit.add(work, sample.seconds, sign)
+
+    def coefficients(self, sampler=None):
+        fit = self.samplers.get(sampler)
+        if fit is None or fit.n < MIN_SAMPLER_SAMPLES:
+            fit = self.all
+        return fit.coefficients()
+
+    def estimate(self, width, height, steps, sampler=None, images=1, hr_width=0, hr_height=0, hr_steps=0):
+        """Estimated seconds, or None without samples."""
+        coefficients = self.coefficients(sampler)
+        if coefficients is None:
+            return None
+        intercept, slope = coefficients
+        return intercept + slope * generation_work(width, height, steps, images, hr_width, hr_height, hr_steps)
+
+    def as_dict(self):
+        """Coefficients for sd-webui-ar.js: seconds = a + b * pixels * steps * images."""
+        with self._lock:
+            return {
+                "samples": len(self.samples),
+                "all": self.all.coefficients(),
+                "samplers": {
+                    name: fit.coefficients()
+                    for name, fit in self.samplers.items()
+                    if fit.n >= MIN_SAMPLER_SAMPLES
+                },
+            }
+
+
+class CostStore:
+    """Append-only CSV of CostSample lines. Each sample is written with one
+    O_APPEND write, so concurrent writers never interleave within a line.
+    Once the file passes compact_bytes it is rewritten with its most recent
+    max_samples lines; appends and the rewrite hold a lock file, so no sample
+    is written to a file that is being replaced."""
+
+    def __init__(self, path, max_samples=MAX_SAMPLES, compact_bytes=COMPACT_BYTES):
+        self.path = Path(path)
+        self.max_samples = max_samples
+        self.compact_bytes = compact_bytes
+        self.lock_file = self.path.with_name(f".{self.path.name}.lock")
+
+    def append(self, sample):
+        with file_lock(self.lock_file):
+            fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+            try:
+                os.write(fd, sample.to_line().encode("utf-8"))
+                size = os.fstat(fd).st_size
+            finally:
+                os.close(fd)
+            if size > self.compact_bytes:
+                self._compact()
+
+    def _compact(self):
+        lines = deque(maxlen=self.max_samples)
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if line.endswith("\n"):
+                    lines.append(line)
+        atomic_write_bytes(self.path, "".join(lines).encode("utf-8"))
+
+    def load(self, limit=MAX_SAMPLES):
+        samples = deque(maxlen=limit)
+        with contextlib.suppress(FileNotFoundError), open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    samples.append(CostSample.from_line(line))
+                except ValueError:
+                    # A torn or hand-edited line
+                    continue
+        return list(samples)
+
+
+_models = {}
+_models_lock = threading.Lock()
+
+
+def get_cost_model(path):
+    """Process-wide model for the store at path, loaded on first use."""
+    key = str(path)
+    with _models_lock:
+        model = _models.get(key)
+        if model is None:
+            model = _models[key] = CostModel(CostStore(path).load())
+        return model
+
+
+def record_generation(path, sample):
+    CostStore(path).append(sample)
+    get_cost_model(path).add(sample)
@@ -0,0 +1,126 @@
+import ast
+import math
+from fractions import Fraction
+
+MAX_EXPRESSION_LENGTH = 128
+# Bounds on every literal and intermediate value, and on the resulting ratio,
+# so an expression can neither build huge Fractions nor overflow float()
+MAX_MAGNITUDE = 10**9
+MAX_RATIO = 10**4
+
+CONSTANTS = {
+    "phi": Fraction((1 + math.sqrt(5)) / 2),
+    "φ": Fraction((1 + math.sqrt(5)) / 2),
+    "silver": Fraction(1 + math.sqrt(2)),
+    "pi": Fraction(math.pi),
+    "π": Fraction(math.pi),
+}
+
+_OPERATORS = {
+    ast.Add: lambda a, b: a + b,
+    ast.Sub: lambda a, b: a - b,
+    ast.Mult: lambda a, b: a * b,
+    ast.Div: lambda a, b: a / b,
+}
+
+
+class RatioExpressionError(ValueError):
+    def __init__(self, message, expression, lineno=None):
+        super().__init__(message)
+        self.message = message
+        self.expression = expression
+        self.lineno = lineno
+
+    def __str__(self):
+        where = f"line {self.lineno}: " if self.lineno is not None else ""
+        return f"{where}{self.message} in {self.expression.strip()!r}"
+
+
+def _evaluate(node, expression):
+    if isinstance(node, ast.Expression):
+        return _evaluate(node.body, expression)
+
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        # Checked as a float first: Fraction("1e9999999") would build a 10 million digit integer
+        if not math.isfinite(node.value) or abs(node.value) > MAX_MAGNITUDE:
+            raise RatioExpressionError("number out of range", expression)
+        if node.value and abs(node.value) < 1 / MAX_MAGNITUDE:
+            raise RatioExpressionError("number out of range", expression)
+        # Go through the literal text so 1.85 becomes 37/20 rather than its binary approximation
+        try:
+            return Fraction(ast.get_source_segment(expression, node))
+        except (TypeError, ValueError):
+            return Fraction(node.value)
+
+    if isinstance(node, ast.Name) and node.id in CONSTANTS:
+        return CONSTANTS[node.id]
+
+    if isinstance(node, ast.BinOp) and type(node.op) in _OPERATORS:
+        left = _evaluate(node.left, expression)
+        right = _evaluate(node.right, expression)
+        if isinstance(node.op, ast.Div) and right == 0:
+            raise RatioExpressionError("division by zero", expression)
+        value = _OPERATORS[type(node.op)](left, right)
+        if abs(value) > MAX_MAGNITUDE:
+            raise RatioExpressionError("number out of range", expression)
+        return value
+
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.UAdd, ast.USub)):
+        value = _evaluate(node.operand, expression)
+        return -value if isinstance(node.op, ast.USub) else value
+
+    unsupported = node.op if isinstance(node, (ast.BinOp, ast.UnaryOp)) else node
+    raise RatioExpressionError(
+        f"unsupported syntax '{type(unsupported).__name__}'", expression
+    )
+
+
+def compile_ratio(expression):
+    """Evaluate a ratio expression such as "16/9", "16:9", "1.85" or "phi"
+    to an exact Fraction. Raises RatioExpressionError for anything else."""
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise RatioExpressionError("expression too long", expression[:MAX_EXPRESSION_LENGTH])
+
+    if expression.count(":") == 1:
+        # "w:h" is a ratio of two sub-expressions
+        numerator, denominator = expression.split(":")
+        # Both sides are checked to be positive, so the division is safe
+        value = compile_ratio(numerator) / compile_ratio(denominator)
+    else:
+        try:
+            tree = ast.parse(expression.strip(), mode="eval")
+            value = _evaluate(tree, expression.strip())
+        except RatioExpressionError:
+            raise
+        except SyntaxError:
+            raise RatioExpressionError("invalid syntax", expression) from None
+        except (ArithmeticError, RecursionError, ValueError, MemoryError) as e:
+            raise RatioExpressionError(f"cannot evaluate ({type(e).__name__})", expression) from None
+
+    if value <= 0:
+        raise RatioExpressionError("ratio must be positive", expression)
+    if not 1 / MAX_RATIO <= value <= MAX_RATIO or not math.isfinite(float(value)):
+        raise RatioExpressionError("ratio out of range", expression)
+    return value
+
+
+def compile_ratios(expressions, linenos=None):
+    """Compile many expressions in one pass, evaluating each distinct one once.
+
+    Returns a list with a Fraction or a RatioExpressionError per input.
+    """
+    compiled = {}
+    results = []
+    for i, expression in enumerate(expressions):
+        key = expression.strip()
+        if key not in compiled:
+            try:
+                compiled[key] = compile_ratio(key)
+            except RatioExpressionError as e:
+                compiled[key] = e
+
+        result = compiled[key]
+        if isinstance(result, RatioExpressionError) and linenos is not None:
+            result = RatioExpressionError(result.message, result.expression, linenos[i])
+        results.append(result)
+    return results
@@ -0,0 +1,156 @@
+"""Hires. fix plans: the base size and upscale factor that reach a target
+size for the least pixel x step work.
+
+Base sizes are a model family's buckets, plus resolution presets that fit
+it. The hires pass is resized to the target, so the webui upscales the base
+to cover the target and crops the rest. A base of ratio rb then costs
+
+    steps * w * h + hr_steps * W * H * max(r / rb, rb / r)
+
+for a W x H target of ratio r. hires. fix only upscales, so bases that
+already cover the target are skipped; a target that matches a base needs no
+second pass, and one smaller than every base is generated as it is.
+
+The candidates are kept sorted by log ratio, so a plan starts at the closest
+ratio and walks outwards. It stops once the second pass alone, plus the
+smallest first pass, costs more than the best plan so far.
+"""
+from bisect import bisect_left
+from functools import lru_cache
+from math import ceil, exp, log
+
+from sd_webui_ar.buckets import bucket_index
+from sd_webui_ar.calc import snap_to_multiple
+from sd_webui_ar.costmodel import generation_work
+
+# The webui's hires. fix resize sliders move in steps of 8
+HIRES_MULTIPLE = 8
+
+
+class HiresPlan:
+    __slots__ = ("family", "target", "base", "scale", "upscaled", "work", "visited", "native")
+
+    def __init__(self, family, target, base, scale, upscaled, work, visited, native=True):
+        self.family = family
+        self.target = target
+        self.base = base
+        self.scale = scale
+        # Size of the hires pass before it is cropped to the target
+        self.upscaled = upscaled
+        self.work = work
+        self.visited = visited
+        # False for a base that is not one of the family's sizes
+        self.native = native
+
+    @property
+    def enabled(self):
+        return self.scale > 1
+
+    def as_dict(self):
+        return {
+            "family": self.family,
+            "target": list(self.target),
+            "base": list(self.base),
+            "scale": self.scale,
+            "upscaled": list(self.upscaled),
+            "enabled": self.enabled,
+        }
+
+    def summary(self, seconds=None):
+        (w, h), (tw, th) = self.base, self.target
+        if self.enabled:
+            text = f"**{w}×{h} → ×{self.scale:.2f} → {tw}×{th}**"
+            uw, uh = self.upscaled
+            if (uw, uh) != (tw, th):
+                text += f" · {uw}×{uh} cropped"
+        elif self.native:
+            text = f"**{w}×{h}** · a {self.family} native size, no hires pass needed"
+        else:
+            text = f"**{w}×{h}** · smaller than every {self.family} base, generated without a hires pass"
+        if seconds is not None:
+            text += f" · ≈{seconds:.0f} s"
+        return text
+
+
+class UpscaleTable:
+    """Candidate base sizes sorted by log aspect ratio (shared with
+    buckets.bucket_index), with their smallest area and largest sides."""
+
+    __slots__ = ("sizes", "size_set", "keys", "min_area", "max_width", "max_height")
+
+    def __init__(self, index):
+        self.sizes = index.sizes
+        self.size_set = frozenset(index.sizes)
+        self.keys = index.keys
+        self.min_area = min((w * h for w, h in self.sizes), default=0)
+        self.max_width = max((w for w, _ in self.sizes), default=0)
+        self.max_height = max((h for _, h in self.sizes), default=0)
+
+
+@lru_cache(maxsize=32)
+def upscale_table(family_name, extra=()):
+    return UpscaleTable(bucket_index(family_name, None, extra))
+
+
+def upscaled_size(base, target):
+    """Size the webui's hires pass renders base at to cover target, before cropping."""
+    (w, h), (tw, th) = base, target
+    if w * th < tw * h:
+        return tw, tw * h // w
+    return th * w // h, th
+
+
+def _outwards(keys, key):
+    """Indices of keys in order of distance from key."""
+    lo = bisect_left(keys, key) - 1
+    hi = lo + 1
+    while lo >= 0 or hi < len(keys):
+        if hi >= len(keys) or (lo >= 0 and key - keys[lo] <= keys[hi] - key):
+            yield lo
+            lo -= 1
+        else:
+            yield hi
+            hi += 1
+
+
+def plan_hires(width, height, family_name, steps=20, hr_steps=0, extra=()):
+    """Cheapest HiresPlan for a width x height output. hr_steps of 0 means
+    the same steps as the first pass, as in the webui."""
+    target = (snap_to_multiple(width, HIRES_MULTIPLE), snap_to_multiple(height, HIRES_MULTIPLE))
+    hr_steps = hr_steps or steps
+    table = upscale_table(family_name, tuple(extra))
+    if not table.sizes:
+        raise LookupError(f"no base sizes for {family_name}")
+
+    tw, th = target
+    key = log(tw / th)
+    keys = table.keys
+    visited = 0
+
+    if target in table.size_set:
+        return HiresPlan(family_name, target, target, 1.0, target, steps * tw * th, 1)
+
+    # The upscaled area is W * H * exp(distance), less at most max(W, H) from rounding down
+    floor = steps * table.min_area - hr_steps * max(tw, th)
+    best = best_work = None
+    for i in _outwards(keys, key):
+        if best is not None and floor + hr_steps * tw * th * exp(abs(keys[i] - key)) > best_work:
+            break
+
+        w, h = table.sizes[i]
+        if w >= tw and h >= th:
+            # Reaching the target from here would take a downscale
+            continue
+        visited += 1
+        uw, uh = upscaled_size((w, h), target)
+        work = generation_work(w, h, steps, 1, uw, uh, hr_steps)
+        if best is None or work < best_work:
+            best, best_work = (w, h), work
+
+    if best is None:
+        # Every base covers the target
+        return HiresPlan(family_name, target, target, 1.0, target, steps * tw * th, visited, native=False)
+    w, h = best
+    # Rounded up, so a base that does not cover the target never shows as x1.00
+    scale = ceil(max(tw / w, th / h) * 100) / 100
+    return HiresPlan(family_name, target, best, scale, upscaled_size(best, target), best_work, visited)
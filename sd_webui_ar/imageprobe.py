@@ -0,0 +1,140 @@
+"""Read image dimensions from PNG, JPEG, WebP and GIF headers without
+decoding any pixels. JPEG sizes honour the EXIF orientation tag, the same
+way gradio's exif_transpose does when it decodes an upload."""
+import base64
+import io
+import struct
+
+# How much of a base64 payload is decoded; enough to get past large EXIF blocks
+PAYLOAD_PREFIX_BYTES = 1024 * 1024
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+_JPEG_SOF_MARKERS = {m for m in range(0xC0, 0xD0)} - {0xC4, 0xC8, 0xCC}
+
+
+def _exif_orientation(segment):
+    if segment[:6] != b"Exif\x00\x00":
+        return 1
+    tiff = segment[6:]
+    endian = {b"II": "<", b"MM": ">"}.get(tiff[:2])
+    if endian is None or len(tiff) < 8:
+        return 1
+
+    ifd = struct.unpack(endian + "I", tiff[4:8])[0]
+    if len(tiff) < ifd + 2:
+        return 1
+    count = struct.unpack(endian + "H", tiff[ifd:ifd + 2])[0]
+    for i in range(count):
+        entry = tiff[ifd + 2 + 12 * i:ifd + 14 + 12 * i]
+        if len(entry) < 12:
+            break
+        if struct.unpack(endian + "H", entry[:2])[0] == 0x0112:
+            orientation = struct.unpack(endian + "H", entry[8:10])[0]
+            return orientation if 1 <= orientation <= 8 else 1
+    return 1
+
+
+def _jpeg_dimensions(f):
+    orientation = 1
+    while True:
+        byte = f.read(1)
+        while byte and byte != b"\xff":
+            byte = f.read(1)
+        while byte == b"\xff":
+            byte = f.read(1)
+        if not byte:
+            return None
+
+        marker = byte[0]
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            # Markers without a length field
+            continue
+        if marker in (0xD9, 0xDA):
+            # End of image or start of scan before any frame header
+            return None
+
+        length = f.read(2)
+        if len(length) < 2:
+            return None
+        length = struct.unpack(">H", length)[0]
+
+        if marker in _JPEG_SOF_MARKERS:
+            frame = f.read(5)
+            if len(frame) < 5:
+                return None
+            h, w = struct.unpack(">HH", frame[1:5])
+            # Orientations 5-8 rotate by 90 degrees
+            return (h, w) if orientation >= 5 else (w, h)
+
+        if marker == 0xE1 and orientation == 1:
+            orientation = _exif_orientation(f.read(length - 2))
+        else:
+            f.seek(length - 2, io.SEEK_CUR)
+
+
+def _webp_dimensions(head):
+    chunk = head[12:16]
+    if chunk == b"VP8 " and head[23:26] == b"\x9d\x01\x2a":
+        w, h = struct.unpack("<HH", head[26:30])
+        return w & 0x3FFF, h & 0x3FFF
+    if chunk == b"VP8L" and head[20] == 0x2F:
+        bits = struct.unpack("<I", head[21:25])[0]
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X":
+        w = int.from_bytes(head[24:27], "little") + 1
+        h = int.from_bytes(head[27:30], "little") + 1
+        return w, h
+    return None
+
+
+def probe_stream(f):
+    """(width, height) from a binary file object positioned at the start of
+    an image, or None if the format is unknown or the header is truncated."""
+    head = f.read(32)
+    if len(head) < 10:
+        return None
+
+    if head.startswith(_PNG_SIGNATURE) and head[12:16] == b"IHDR":
+        return struct.unpack(">II", head[16:24])
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return struct.unpack("<HH", head[6:10])
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP" and len(head) >= 30:
+        return _webp_dimensions(head)
+    if head[:2] == b"\xff\xd8":
+        f.seek(2)
+        return _jpeg_dimensions(f)
+    return None
+
+
+def decode_payload(payload, limit=PAYLOAD_PREFIX_BYTES):
+    """Bytes of a bytes, base64 or data URL payload, decoding at most the
+    first limit bytes."""
+    if isinstance(payload, (bytes, bytearray, memoryview)):
+        return bytes(payload[:limit])
+
+    # Slice before anything else so a multi-megabyte payload is never copied
+    start = payload.find(",", 0, 256) + 1 if payload.startswith("data:") else 0
+    chars = -(-limit // 3) * 4
+    prefix = payload[start:start + chars]
+    prefix = prefix[:len(prefix) - len(prefix) % 4]
+    try:
+        return base64.b64decode(prefix)
+    except ValueError:
+        return b""
+
+
+def probe_dimensions(payload, limit=PAYLOAD_PREFIX_BYTES):
+    """(width, height) from an image held as bytes, base64 or a data URL."""
+    if not payload:
+        return None
+    # Most headers are in the first few KiB; only JPEGs with big EXIF blocks need more
+    for size in sorted({min(64 * 1024, limit), limit}):
+        dims = probe_stream(io.BytesIO(decode_payload(payload, size)))
+        if dims is not None:
+            return dims
+    return None
+
+
+def probe_file(path):
+    with open(path, "rb") as f:
+        return probe_stream(f)
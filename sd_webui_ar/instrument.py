@@ -0,0 +1,139 @@
+"""Timing of the extension's startup work and of its event handlers.
+
+Off unless the SD_WEBUI_AR_PROFILE environment variable is set. While
+disabled, fast_handler() returns the handler unchanged and timed()
+functions cost one flag check per call. If the variable names a .json file,
+the report is also written there when the process exits.
+"""
+import atexit
+import bisect
+import json
+import os
+import threading
+import time
+from functools import wraps
+
+from sd_webui_ar.catalog import cache_stats
+
+ENV_VAR = "SD_WEBUI_AR_PROFILE"
+
+# Upper bounds of the latency histogram buckets, in milliseconds
+HISTOGRAM_BOUNDS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 1000)
+_BOUNDS = tuple(b / 1000 for b in HISTOGRAM_BOUNDS_MS)
+
+enabled = os.environ.get(ENV_VAR, "") not in ("", "0")
+
+
+def set_enabled(value):
+    """Switch timing on or off. Handlers already registered keep their state."""
+    global enabled
+    enabled = bool(value)
+
+
+class HandlerStats:
+    __slots__ = ("calls", "total", "max", "histogram")
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.histogram = [0] * (len(_BOUNDS) + 1)
+
+    def add(self, elapsed):
+        self.calls += 1
+        self.total += elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+        self.histogram[bisect.bisect_left(_BOUNDS, elapsed)] += 1
+
+    def as_dict(self):
+        labels = [f"<={b}ms" for b in HISTOGRAM_BOUNDS_MS] + [f">{HISTOGRAM_BOUNDS_MS[-1]}ms"]
+        return {
+            "calls": self.calls,
+            "total_ms": self.total * 1000,
+            "mean_ms": self.total / self.calls * 1000 if self.calls else 0.0,
+            "max_ms": self.max * 1000,
+            "histogram": {label: n for label, n in zip(labels, self.histogram) if n},
+        }
+
+
+_handlers = {}
+_startup = {}
+_lock = threading.Lock()
+
+
+def _record(table, name, elapsed):
+    with _lock:
+        stats = table.get(name)
+        if stats is None:
+            stats = table[name] = HandlerStats()
+        stats.add(elapsed)
+
+
+def fast_handler(name, fn):
+    """Wrap an event handler so its calls and latency are counted under name."""
+    if not enabled:
+        return fn
+
+    @wraps(fn)
+    def handler(*args):
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            _record(_handlers, name, time.perf_counter() - start)
+
+    return handler
+
+
+def timed(name, label=None):
+    """Decorator recording each call under name in the startup section.
+    label, if given, is called with the same arguments and its result is
+    appended to the name, e.g. ui[txt2img]."""
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                key = f"{name}[{label(*args, **kwargs)}]" if label else name
+                _record(_startup, key, time.perf_counter() - start)
+
+        return wrapper
+
+    return decorator
+
+
+def handler_stats():
+    with _lock:
+        return {name: stats.as_dict() for name, stats in _handlers.items()}
+
+
+def startup_stats():
+    with _lock:
+        return {name: stats.as_dict() for name, stats in _startup.items()}
+
+
+def report(**extra):
+    return {
+        "enabled": enabled,
+        "startup": startup_stats(),
+        "handlers": handler_stats(),
+        "catalog_cache": cache_stats(),
+        **extra,
+    }
+
+
+def write_report(path, **extra):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(report(**extra), f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+if enabled and os.environ[ENV_VAR].endswith(".json"):
+    atexit.register(lambda: write_report(os.environ[ENV_VAR]))
@@ -0,0 +1,22 @@
+from sd_webui_ar.buckets import MODEL_FAMILIES, nearest_bucket
+from sd_webui_ar.calc import apply_aspect_ratio, apply_pixel_area
+
+# How the aspect ratio buttons pick the new size
+AR_MODE_KEEP_SIDE = "Keep side"
+AR_MODE_KEEP_AREA = "Keep area"
+AR_MODE_BUCKETS = {f"{name} bucket": name for name in MODEL_FAMILIES}
+AR_MODES = [AR_MODE_KEEP_SIDE, AR_MODE_KEEP_AREA, *AR_MODE_BUCKETS]
+
+AREA_MULTIPLE = 64
+MEGAPIXEL = 1024 * 1024
+
+
+def apply_preset_ratio(ar, w, h, mode=AR_MODE_KEEP_SIDE, area=None, multiple=AREA_MULTIPLE):
+    """New (w, h) for an aspect ratio button. In keep-area mode the pixel
+    count stays at area, or at w * h when area is not given."""
+    if mode in AR_MODE_BUCKETS:
+        # Nearest trained resolution for this ratio, already a latent multiple
+        return list(nearest_bucket(ar, AR_MODE_BUCKETS[mode]))
+    if mode == AR_MODE_KEEP_AREA:
+        return apply_pixel_area(ar, area or w * h, multiple)
+    return apply_aspect_ratio(ar, w, h)
@@ -0,0 +1,72 @@
+from bisect import bisect_left
+from fractions import Fraction
+from functools import lru_cache
+from math import log
+
+from sd_webui_ar.calc import get_reduced_ratio, reduce_ratio
+
+MAX_DENOMINATOR = 32
+# Only name a preset in the display when it is at least this close
+PRESET_TOLERANCE = 0.05
+
+
+@lru_cache(maxsize=4096)
+def approximate_ratio(w, h, max_denominator=MAX_DENOMINATOR):
+    """Closest ratio to w:h whose smaller term is at most max_denominator.
+
+    Fraction.limit_denominator walks the continued fraction expansion
+    (the Stern-Brocot path), so 1365x768 gives 16:9 rather than 455:256.
+    Returns (n, d, exact).
+    """
+    n, d = reduce_ratio(w, h)
+    if min(n, d) <= max_denominator:
+        return n, d, True
+
+    if w >= h:
+        approx = Fraction(w, h).limit_denominator(max_denominator)
+        n, d = approx.numerator, approx.denominator
+    else:
+        approx = Fraction(h, w).limit_denominator(max_denominator)
+        d, n = approx.numerator, approx.denominator
+    if (n, d) == (8, 5):
+        n, d = 16, 10
+    return n, d, False
+
+
+class RatioIndex:
+    """Aspect ratio presets sorted by log ratio for O(log n) nearest lookups."""
+
+    __slots__ = ("presets", "keys")
+
+    def __init__(self, presets):
+        self.presets = sorted(presets, key=lambda p: p.value)
+        self.keys = [log(p.value) for p in self.presets]
+
+    def nearest(self, ratio):
+        """Return (preset, relative error of the preset against ratio), or
+        (None, None) when the index is empty."""
+        if not self.presets:
+            return None, None
+
+        key = log(ratio)
+        i = bisect_left(self.keys, key)
+        if i == len(self.keys) or (i > 0 and key - self.keys[i - 1] <= self.keys[i] - key):
+            i -= 1
+        preset = self.presets[i]
+        return preset, preset.value / ratio - 1
+
+
+def describe_ratio(w, h, index=None):
+    """Markdown for the calculator display, e.g. "**≈16:9** · 16:9 -0.1%"."""
+    w, h = int(w or 0), int(h or 0)
+    if w <= 0 or h <= 0:
+        return f"**{get_reduced_ratio(w, h)}**"
+
+    n, d, exact = approximate_ratio(w, h)
+    text = f"**{'' if exact else '≈'}{n}:{d}**"
+
+    if index is not None:
+        preset, error = index.nearest(w / h)
+        if preset is not None and abs(error) <= PRESET_TOLERANCE:
+            text += f" · {preset.label.strip()} {error:+.1%}"
+    return text
@@ -0,0 +1,133 @@
+"""Background watcher that reports changes to the preset files.
+
+Uses inotify (through the optional inotify_simple package) when it is
+installed and falls back to polling mtime and size otherwise. Bursts of
+writes, such as an editor's save-to-temp-and-rename, are debounced into a
+single callback.
+"""
+import os
+import threading
+import time
+from pathlib import Path
+
+try:
+    from inotify_simple import INotify, flags
+except ImportError:
+    INotify = None
+
+DEBOUNCE_SECONDS = 0.5
+POLL_SECONDS = 1.0
+
+
+def _signature(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class PresetWatcher:
+    def __init__(self, paths, on_change, debounce=DEBOUNCE_SECONDS, poll=POLL_SECONDS, use_inotify=True):
+        """on_change is called from the watcher thread with the set of
+        changed paths, once per burst of writes."""
+        self.paths = [Path(p) for p in paths]
+        self.on_change = on_change
+        self.debounce = debounce
+        self.poll = poll
+        self.use_inotify = use_inotify and INotify is not None
+        self._stop = threading.Event()
+        self._thread = None
+        self._inotify = None
+
+    @property
+    def backend(self):
+        return "inotify" if self.use_inotify else "polling"
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            # Set up before returning, so no change made after start() is missed
+            try:
+                wait = self._inotify_waiter() if self.use_inotify else self._polling_waiter()
+            except OSError as e:
+                print(f"aspect ratio preset watcher falling back to polling: {e}")
+                if self._inotify is not None:
+                    self._inotify.close()
+                    self._inotify = None
+                self.use_inotify = False
+                wait = self._polling_waiter()
+            self._thread = threading.Thread(target=self._run, args=(wait,), name="sd-webui-ar watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the thread and release the inotify descriptor; start() may be called again."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self, wait):
+        pending = set()
+        try:
+            while not self._stop.is_set():
+                changed = wait(self.debounce if pending else self.poll)
+                if changed:
+                    pending |= changed
+                elif pending:
+                    # Quiet for a whole debounce period: the burst is over
+                    try:
+                        self.on_change(pending)
+                    except Exception as e:
+                        print(f"error reloading aspect ratio presets: {e}")
+                    pending = set()
+        finally:
+            if self._inotify is not None:
+                self._inotify.close()
+                self._inotify = None
+
+    def _polling_waiter(self):
+        signatures = {p: _signature(p) for p in self.paths}
+
+        def wait(timeout):
+            if self._stop.wait(timeout):
+                return set()
+            changed = set()
+            for path, old in signatures.items():
+                new = _signature(path)
+                if new != old:
+                    signatures[path] = new
+                    changed.add(path)
+            return changed
+
+        return wait
+
+    def _inotify_waiter(self):
+        inotify = self._inotify = INotify()
+        mask = flags.CLOSE_WRITE | flags.MOVED_TO | flags.CREATE | flags.DELETE
+        # Watch the directories, so files replaced by a rename are still seen
+        watches = {}
+        for path in self.paths:
+            directory = path.parent
+            if directory not in watches.values():
+                watches[inotify.add_watch(directory, mask)] = directory
+        by_location = {(p.parent, p.name): p for p in self.paths}
+
+        def wait(timeout):
+            # Short reads so stop() is noticed promptly
+            deadline = time.monotonic() + timeout
+            changed = set()
+            while not self._stop.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                for event in inotify.read(timeout=int(min(remaining, 0.25) * 1000)):
+                    path = by_location.get((watches.get(event.wd), event.name))
+                    if path is not None:
+                        changed.add(path)
+                if changed:
+                    break
+            return changed
+
+        return wait
@@ -0,0 +1,138 @@
+"""Check the in-browser calculator, keep-area sizes and image header probe in
+javascript/sd-webui-ar.js against the Python reference functions on a
+generated corpus. Needs node on PATH.
+
+    python tools/check_js_parity.py [cases]
+"""
+import base64
+import io
+import json
+import random
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from sd_webui_ar.calc import apply_pixel_area, get_reduced_ratio, solve_aspect_ratio  # noqa: E402
+from sd_webui_ar.catalog import AspectRatioPreset  # noqa: E402
+from sd_webui_ar.expressions import compile_ratio  # noqa: E402
+from sd_webui_ar.imageprobe import probe_dimensions  # noqa: E402
+from sd_webui_ar.ratios import RatioIndex, describe_ratio  # noqa: E402
+
+PRESETS = [
+    ("1:1", "1"), ("3:2", "3/2"), ("4:3", "4/3"), ("16:9", "16/9"), ("1.85", "1.85"),
+    ("16:10", "1.6"), ("21:9", "2.33"), ("2:3", "0.67"), ("9:16", "0.56"), ("𝜑", "phi"),
+]
+
+# Runs the JS file in a sandbox with the webui globals it touches stubbed out
+NODE_RUNNER = r"""
+const fs = require("fs");
+const vm = require("vm");
+const [source, input] = process.argv.slice(2).map(f => fs.readFileSync(f, "utf8"));
+const {presets, cases} = JSON.parse(input);
+const context = {atob, onUiUpdate: () => {}, document: {querySelectorAll: () => [], addEventListener: () => {}}, arsp__ar_preset_ratios: presets};
+vm.createContext(context);
+vm.runInContext(source, context);
+const results = vm.runInContext(`(${(cases) => cases.map(([fn, args]) => {
+    if (fn === "describe_ratio") {
+        return arsp__describe_ratio(...args, arsp__ar_presets());
+    }
+    return globalThis["arsp__" + fn](...args);
+})})`, context)(cases);
+process.stdout.write(JSON.stringify(results));
+"""
+
+
+def make_cases(count):
+    rng = random.Random(0)
+    sizes = [rng.randint(1, 8192) for _ in range(count)]
+    sizes += [0, 1, 512, 768, 1024, 1365, 1600, 1000, 403, 716]
+    cases = []
+    for _ in range(count):
+        w, h = rng.choice(sizes), rng.choice(sizes)
+        n, d = rng.choice(sizes[:-10]) or 1, rng.randint(1, 8192)
+        cases.append(("get_reduced_ratio", [w, h]))
+        cases.append(("solve_aspect_ratio", [w, 0, n, d]))
+        cases.append(("solve_aspect_ratio", [0, h, n, d]))
+        cases.append(("describe_ratio", [w, h]))
+        # Keep-area sizes, at the current area or a megapixel budget, for each area multiple
+        area = rng.choice([w * h, round(rng.uniform(0.25, 4) * 1024 * 1024)]) or 1
+        cases.append(("apply_pixel_area", [n / d, area, rng.choice([8, 16, 32, 64])]))
+    cases += image_cases()
+    # Exact halves exercise round-half-even
+    cases += [("solve_aspect_ratio", [w, 0, 2, 1]) for w in range(1, 40, 2)]
+    cases += [("solve_aspect_ratio", [0, h, 1, 2]) for h in range(1, 40, 2)]
+    return cases
+
+
+def image_cases():
+    try:
+        from PIL import Image
+    except ImportError:
+        return []
+
+    cases = []
+    for fmt, options in [("PNG", {}), ("GIF", {}), ("JPEG", {}), ("WEBP", {}), ("WEBP", {"lossless": True})]:
+        for size in [(1, 1), (403, 716), (1344, 768), (4000, 2250)]:
+            buffer = io.BytesIO()
+            image = Image.new("RGB", size)
+            exif = image.getexif()
+            exif[0x0112] = 6
+            image.save(buffer, fmt, **options, **({"exif": exif} if fmt == "JPEG" else {}))
+            url = "data:image/x;base64," + base64.b64encode(buffer.getvalue()).decode()
+            cases.append(("probe_data_url", [url, 64 * 1024]))
+    return cases
+
+
+def expected(cases, index):
+    functions = {
+        "get_reduced_ratio": get_reduced_ratio,
+        "solve_aspect_ratio": solve_aspect_ratio,
+        "apply_pixel_area": apply_pixel_area,
+        "describe_ratio": lambda w, h: describe_ratio(w, h, index),
+        "probe_data_url": lambda url, limit: list(probe_dimensions(url, limit) or []) or None,
+    }
+    return [functions[fn](*args) for fn, args in cases]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    presets = [AspectRatioPreset(label, compile_ratio(value)) for label, value in PRESETS]
+    cases = make_cases(count)
+
+    input_file = ROOT / "tools" / ".js_parity_input.json"
+    runner_file = ROOT / "tools" / ".js_parity_runner.js"
+    input_file.write_text(
+        json.dumps({"presets": [[p.label, p.value] for p in presets], "cases": cases}),
+        encoding="utf-8",
+    )
+    runner_file.write_text(NODE_RUNNER, encoding="utf-8")
+    try:
+        result = subprocess.run(
+            ["node", str(runner_file), str(ROOT / "javascript" / "sd-webui-ar.js"), str(input_file)],
+            capture_output=True,
+            text=True,
+        )
+    finally:
+        input_file.unlink()
+        runner_file.unlink()
+
+    if result.returncode:
+        print(result.stderr)
+        return result.returncode
+
+    mismatches = [
+        (case, want, got)
+        for case, want, got in zip(cases, expected(cases, RatioIndex(presets)), json.loads(result.stdout))
+        if want != got
+    ]
+    for (fn, args), want, got in mismatches[:20]:
+        print(f"{fn}{tuple(args)!r:.120}: python {want!r}, js {got!r}")
+    print(f"{len(cases) - len(mismatches)}/{len(cases)} cases match")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())